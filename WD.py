@@ -8,6 +8,7 @@ Fixes for PyInstaller:
 - Show a Windows MessageBox on fatal startup errors
 - Force Qt plugin paths in frozen mode (common "silent exit" cause)
 - Add `--test` mode so build scripts can validate the exe quickly
+- Add `--debug` mode to show refresh timing in the status bar
 """
 
 from __future__ import annotations
@@ -250,7 +251,7 @@ def main() -> int:
         except Exception as e:
             logging.exception("Theme apply failed: %s", e)
 
-        window = WDMainWindow()
+        window = WDMainWindow(debug="--debug" in sys.argv)
         window.show()
 
         # Helps if the window is created off-screen / behind other windows
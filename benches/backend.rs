@@ -0,0 +1,108 @@
+// Throughput of every wdlib entry point on generated corpora of 1 KB to 100 MB.
+//
+// cargo bench --no-default-features --bench backend
+//
+// Benchmark ids are `<corpus>/<size>/<entry point>`, so a subset can be
+// selected with a filter, e.g. `-- english/10MB` or `-- /readability`.
+// Before shipping a wdlib build, compare against the last shipped one:
+//
+//   git checkout <last release>
+//   cargo bench --no-default-features --bench backend -- --save-baseline shipped
+//   git checkout -
+//   cargo bench --no-default-features --bench backend -- --baseline shipped
+//
+// Criterion keeps baselines under target/criterion and reports every
+// throughput change against them.
+
+mod corpus;
+
+use criterion::{black_box, criterion_group, criterion_main, Criterion, Throughput};
+use std::time::Duration;
+
+use corpus::MB;
+use wdlib::bench::{analyze_batch, analyze_bytes, count_chars, word_bins, BinBy, Matcher};
+use wdlib::{Analyzer, AnalyzerConfig, Readability, StreamingAnalyzer, TokenTable, WordStats};
+
+const KEYWORDS: &[&str] = &["the", "word counter", "readability", "naïve", "δρόμος", "東京", "日本語"];
+
+// Chunk size fed to the streaming analyzer, as a file reader would
+const STREAM_CHUNK: usize = 64 * 1024;
+
+// Documents per batch in the analyze_many benchmark
+const BATCH_DOCUMENTS: usize = 64;
+
+// Token tables hold five columns per token, about 0.5 GB for 100 MB of text
+const TOKEN_TABLE_MAX_BYTES: usize = 10 * MB;
+
+fn entry_points(c: &mut Criterion) {
+    let config = AnalyzerConfig::default();
+    let matcher = Matcher::new(KEYWORDS, true).unwrap();
+
+    for corpus in corpus::ALL {
+        for (size, label) in corpus::SIZES {
+            // Generated once per group and dropped before the next size
+            let text = corpus::generate(corpus, size);
+            let mut group = c.benchmark_group(format!("{}/{}", corpus::name(corpus), label));
+            group.throughput(Throughput::BytesDecimal(text.len() as u64));
+            if size >= 10 * MB {
+                group.sample_size(10).measurement_time(Duration::from_secs(30));
+            }
+
+            // A new analyzer per call, as analyze_text_fast does
+            group.bench_function("word_stats", |b| {
+                b.iter(|| {
+                    let mut stats = WordStats::new();
+                    stats.analyze(black_box(&text));
+                    stats
+                })
+            });
+
+            let mut analyzer = Analyzer::new(config.clone());
+            group.bench_function("analyzer", |b| b.iter(|| analyzer.analyze(black_box(&text), None).unwrap()));
+            group.bench_function("analyze_file", |b| {
+                b.iter(|| analyze_bytes(&mut analyzer, black_box(text.as_bytes()), false, None).unwrap())
+            });
+            group.bench_function("count_characters", |b| b.iter(|| count_chars(black_box(&text))));
+            group.bench_function("streaming", |b| {
+                b.iter(|| {
+                    let mut stream = StreamingAnalyzer::new(config.clone());
+                    for chunk in black_box(text.as_bytes()).chunks(STREAM_CHUNK) {
+                        stream.feed_bytes(chunk, None).unwrap();
+                    }
+                    stream.finish()
+                })
+            });
+            let documents = corpus::documents(&text, BATCH_DOCUMENTS);
+            group.bench_function("analyze_many", |b| {
+                b.iter(|| analyze_batch(black_box(&documents), &config, None).unwrap())
+            });
+            if size <= TOKEN_TABLE_MAX_BYTES {
+                group.bench_function("token_table", |b| {
+                    b.iter(|| TokenTable::build(&mut analyzer, black_box(&text), None).unwrap())
+                });
+                group.bench_function("frequency_matrix", |b| {
+                    b.iter(|| {
+                        let table = TokenTable::build(&mut analyzer, black_box(&text), None).unwrap();
+                        word_bins(&table, 15, 20, BinBy::Words)
+                    })
+                });
+                // One details refresh: a single table shared by every consumer
+                group.bench_function("details", |b| {
+                    b.iter(|| {
+                        let table = TokenTable::build(&mut analyzer, black_box(&text), None).unwrap();
+                        let matrix = word_bins(&table, 15, 20, BinBy::Characters);
+                        (matrix, Readability::from_tokens(&table), matcher.count_tokens(&table))
+                    })
+                });
+            }
+            group.bench_function("readability", |b| {
+                b.iter(|| Readability::measure(&analyzer, black_box(&text), None).unwrap())
+            });
+            group.bench_function("keywords", |b| b.iter(|| matcher.count(black_box(&text))));
+            group.finish();
+        }
+    }
+}
+
+criterion_group!(benches, entry_points);
+criterion_main!(benches);
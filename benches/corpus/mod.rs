@@ -0,0 +1,136 @@
+// Deterministic generated corpora shared by the benches.
+
+#![allow(dead_code)]
+
+pub const KB: usize = 1000;
+pub const MB: usize = 1000 * KB;
+
+// 1 KB, 100 KB, 10 MB and 100 MB, with the labels used in benchmark ids
+pub const SIZES: [(usize, &str); 4] = [(KB, "1KB"), (100 * KB, "100KB"), (10 * MB, "10MB"), (100 * MB, "100MB")];
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Corpus {
+    English,
+    // Latin with diacritics, Greek, Cyrillic, emoji and typographic punctuation
+    MixedUnicode,
+    // Chinese and Japanese without spaces, as such text is written
+    Cjk,
+    // One run of letters with no whitespace or sentence break at all
+    NoWhitespace,
+    // Seven-letter words that almost never repeat; the worst case for word
+    // counting, so only the vocabulary bench uses it (not in ALL)
+    UniqueWords,
+}
+
+pub const ALL: [Corpus; 4] = [Corpus::English, Corpus::MixedUnicode, Corpus::Cjk, Corpus::NoWhitespace];
+
+const ENGLISH: &[&str] = &[
+    "the", "of", "and", "to", "a", "in", "is", "it", "that", "was", "for", "on", "with", "as", "he",
+    "she", "they", "be", "at", "by", "this", "had", "not", "but", "from", "or", "have", "an", "which",
+    "one", "word", "counter", "text", "analysis", "frequency", "reading", "sentence", "paragraph",
+    "privacy", "offline", "readability", "don't", "it's", "well-known", "Tuesday", "London",
+    "extraordinarily", "characteristically", "documentation", "understanding",
+];
+
+const MIXED: &[&str] = &[
+    "naïve", "café", "façade", "Ærøskøbing", "straße", "résumé", "élève", "ÉCOLE", "déjà-vu",
+    "δρόμος", "οδός", "Αθήνα", "λόγος", "слово", "текст", "Москва", "частота", "l\u{2019}été",
+    "\u{201c}quoted\u{201d}", "emoji\u{1f600}", "🚀", "word", "the", "and",
+];
+
+const CJK: &[&str] = &[
+    "文字", "数える", "東京", "日本語", "中文", "分析", "頻度", "読みやすさ", "段落", "文章", "我们",
+    "的", "是", "了", "在", "。", "、", "「", "」", "！",
+];
+
+// xorshift32; the same seed gives the same text on every machine
+struct Rng(u32);
+
+impl Rng {
+    fn next(&mut self) -> u32 {
+        self.0 ^= self.0 << 13;
+        self.0 ^= self.0 >> 17;
+        self.0 ^= self.0 << 5;
+        self.0
+    }
+
+    // Index skewed towards the start of the list, roughly like word frequencies
+    fn skewed(&mut self, len: usize) -> usize {
+        let draw = (self.next() % 1000) as usize;
+        draw * draw * len / 1_000_000
+    }
+}
+
+// Text of `corpus` of at least `bytes` bytes (at most a few bytes more)
+pub fn generate(corpus: Corpus, bytes: usize) -> String {
+    let mut text = String::with_capacity(bytes + 64);
+    let mut rng = Rng(0x2545_f491);
+    match corpus {
+        Corpus::English | Corpus::MixedUnicode => {
+            let words = if corpus == Corpus::English { ENGLISH } else { MIXED };
+            while text.len() < bytes {
+                text.push_str(words[rng.skewed(words.len())]);
+                let r = rng.next();
+                text.push_str(match r % 64 {
+                    0 => ".\n\n",
+                    1..=3 => ". ",
+                    4 => "? ",
+                    5..=7 => ", ",
+                    _ => " ",
+                });
+            }
+        }
+        Corpus::Cjk => {
+            while text.len() < bytes {
+                text.push_str(CJK[rng.skewed(CJK.len())]);
+                if rng.next() % 200 == 0 {
+                    text.push_str("。\n\n");
+                }
+            }
+        }
+        Corpus::NoWhitespace => {
+            while text.len() < bytes {
+                text.push((b'a' + (rng.next() % 26) as u8) as char);
+            }
+        }
+        Corpus::UniqueWords => {
+            // Letters spelled from a scrambled counter; digits would split words
+            let mut n = 0u64;
+            while text.len() < bytes {
+                let mut letters = n.wrapping_mul(0x9e37_79b9_7f4a_7c15) >> 20;
+                for _ in 0..7 {
+                    text.push((b'a' + (letters % 26) as u8) as char);
+                    letters /= 26;
+                }
+                text.push(' ');
+                n += 1;
+            }
+        }
+    }
+    text
+}
+
+pub fn name(corpus: Corpus) -> &'static str {
+    match corpus {
+        Corpus::English => "english",
+        Corpus::MixedUnicode => "mixed_unicode",
+        Corpus::Cjk => "cjk",
+        Corpus::NoWhitespace => "no_whitespace",
+        Corpus::UniqueWords => "unique_words",
+    }
+}
+
+// `text` cut into `n` documents at character boundaries
+pub fn documents(text: &str, n: usize) -> Vec<&str> {
+    let mut documents = Vec::with_capacity(n);
+    let mut start = 0;
+    for i in 1..=n {
+        let mut end = text.len() * i / n;
+        while !text.is_char_boundary(end) {
+            end += 1;
+        }
+        documents.push(&text[start..end]);
+        start = end;
+    }
+    documents
+}
@@ -0,0 +1,79 @@
+// Word interning: Vocab (FxHash table of ids over one arena) against a
+// SipHash HashMap<String, usize>, on the same pre-tokenized words.
+//
+// cargo bench --no-default-features --bench vocab
+//
+// Both sides get the tokens the scanner produces and lowercase them into a
+// reused buffer with the same function (Vocab's own), so the difference is
+// the hashing and the storage of the words: an arena append per new word
+// against a String allocation per new word.
+
+mod corpus;
+
+use criterion::{black_box, criterion_group, criterion_main, BenchmarkId, Criterion, Throughput};
+use std::collections::HashMap;
+
+use corpus::{Corpus, MB};
+use wdlib::bench::{lowercase_into, Token, Tokenizer, Vocab};
+
+const CORPORA: [Corpus; 3] = [Corpus::English, Corpus::MixedUnicode, Corpus::UniqueWords];
+
+// Words of `text` as the analyzer's scanner splits them
+fn tokens(text: &str) -> Vec<&str> {
+    let mut words = Vec::new();
+    Tokenizer::default()
+        .scan(text, &mut |token: Token| words.push(&text[token.start..token.start + token.text.len()]), None)
+        .unwrap();
+    words
+}
+
+fn hashmap(words: &[&str]) -> usize {
+    let mut counts: HashMap<String, usize> = HashMap::new();
+    let mut lower = String::new();
+    for word in words {
+        lowercase_into(word, &mut lower);
+        match counts.get_mut(lower.as_str()) {
+            Some(count) => *count += 1,
+            None => {
+                counts.insert(lower.clone(), 1);
+            }
+        }
+    }
+    counts.len()
+}
+
+fn vocab(vocab: &mut Vocab, words: &[&str]) -> usize {
+    vocab.reset();
+    for word in words {
+        vocab.add(word);
+    }
+    vocab.len()
+}
+
+fn interning(c: &mut Criterion) {
+    for corpus in CORPORA {
+        for &(size, label) in corpus::SIZES.iter().filter(|&&(size, _)| size <= 10 * MB) {
+            let text = corpus::generate(corpus, size);
+            let words = tokens(&text);
+            let mut group = c.benchmark_group(format!("vocab/{}/{}", corpus::name(corpus), label));
+            group.throughput(Throughput::BytesDecimal(text.len() as u64));
+
+            group.bench_with_input(BenchmarkId::new("hashmap", words.len()), &words, |b, words| {
+                b.iter(|| hashmap(black_box(words)))
+            });
+            // A new Vocab every run: arena and table grow from empty like the HashMap
+            group.bench_with_input(BenchmarkId::new("vocab", words.len()), &words, |b, words| {
+                b.iter(|| vocab(&mut Vocab::new(), black_box(words)))
+            });
+            // A reused Vocab, as inside a reused Analyzer: the words are interned already
+            let mut reused = Vocab::new();
+            group.bench_with_input(BenchmarkId::new("vocab_reused", words.len()), &words, |b, words| {
+                b.iter(|| vocab(&mut reused, black_box(words)))
+            });
+            group.finish();
+        }
+    }
+}
+
+criterion_group!(benches, interning);
+criterion_main!(benches);
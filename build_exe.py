@@ -193,6 +193,10 @@ hiddenimports = [
 
     # your internal modules
     'src.ui_mainwindow',
+    'src.analysis_worker',
+    'src.document',
+    'src.letters',
+    'src.refresh_scheduler',
     'src.export_manager',
     'src.theme_manager',
 ] + pyqt6_hidden + mpl_hidden + jinja2_hidden + pillow_hidden + textstat_hidden + wordcloud_hidden
@@ -0,0 +1,88 @@
+"""
+Generate src/letters.py from the Rust scanner
+
+The Python fallback tokenizer must treat exactly the characters the scanner
+treats as letters as letters. Python's Unicode tables are not Rust's, so the
+list is read from wdlib itself: every code point goes through the scanner on
+its own, and the ones that come back as words are letters.
+
+Run from the repository root with the Rust backend built:
+
+    python scripts/gen_letters.py
+"""
+
+import sys
+from pathlib import Path
+
+import wdlib
+
+OUTPUT = Path(__file__).resolve().parent.parent / "src" / "letters.py"
+LINE_WIDTH = 72
+
+HEADER = '''"""
+WD - Letters
+The characters the Rust scanner counts as letters, for the Python fallback tokenizer
+"""
+
+# Generated by scripts/gen_letters.py from the scanner's classify(): every
+# non-ASCII character that is not whitespace and is alphabetic or a combining
+# mark. Python's own Unicode tables differ from Rust's (a virama is not \\w,
+# "²" is), so the fallback uses this list instead. tests/test_document.py
+# checks it against the scanner; rerun the script when Rust's Unicode
+# version changes.
+NON_ASCII_LETTERS = (
+'''
+
+
+def letter_code_points():
+    """Non-ASCII code points the scanner reads as a word on their own"""
+    code_points = [cp for cp in range(0x80, 0x110000) if not 0xD800 <= cp <= 0xDFFF]
+    text = " ".join(map(chr, code_points))
+    # Character i of code_points sits at offset 2 * i
+    return [code_points[start // 2] for start in wdlib.token_table(text).starts.tolist()]
+
+
+def ranges(code_points):
+    """Runs of consecutive code points as (first, last)"""
+    runs = []
+    for cp in code_points:
+        if runs and runs[-1][1] + 1 == cp:
+            runs[-1][1] = cp
+        else:
+            runs.append([cp, cp])
+    return runs
+
+
+def escape(cp):
+    return f"\\u{cp:04X}" if cp <= 0xFFFF else f"\\U{cp:08X}"
+
+
+def character_class(runs):
+    """Regex character class body, a range only where it saves characters"""
+    items = []
+    for first, last in runs:
+        if first == last:
+            items.append(escape(first))
+        elif last == first + 1:
+            items.append(escape(first) + escape(last))
+        else:
+            items.append(f"{escape(first)}-{escape(last)}")
+    return items
+
+
+def main():
+    lines, line = [], ""
+    for item in character_class(ranges(letter_code_points())):
+        if len(line) + len(item) > LINE_WIDTH:
+            lines.append(line)
+            line = ""
+        line += item
+    lines.append(line)
+
+    body = "".join(f'    "{line}"\n' for line in lines)
+    OUTPUT.write_text(HEADER + body + ")\n", encoding="utf-8")
+    print(f"Wrote {len(lines)} lines to {OUTPUT}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+WD - Background analysis
+Runs text analysis on a worker thread and hands results back to the GUI thread
+"""
+
+import logging
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+try:
+    from wdlib import Cancelled
+except ImportError:
+    class Cancelled(Exception):
+        """Stand-in so the worker can catch cancellation without the Rust backend"""
+
+
+class AnalysisSignals(QObject):
+    """Signals of one analysis task, emitted from the worker thread"""
+
+    # (revision, result)
+    finished = pyqtSignal(int, object)
+    # (revision, error message)
+    failed = pyqtSignal(int, str)
+
+
+class AnalysisTask(QRunnable):
+    """Runs job(*args) for one document revision on a thread pool"""
+
+    def __init__(self, revision: int, job: Callable[..., Any], *args):
+        super().__init__()
+        self.revision = revision
+        self.job = job
+        self.args = args
+        # Created on the GUI thread, so connected slots run there
+        self.signals = AnalysisSignals()
+
+    def run(self):
+        try:
+            result = self.job(*self.args)
+        except Cancelled:
+            # A newer revision superseded this one; nobody wants the result
+            return
+        except Exception as e:
+            logging.exception("Analysis of revision %d failed", self.revision)
+            self.signals.failed.emit(self.revision, str(e))
+            return
+        self.signals.finished.emit(self.revision, result)
@@ -0,0 +1,450 @@
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use std::cmp::Ordering;
+use std::time::Instant;
+
+use crate::cancel::{CancelToken, Cancelled};
+use crate::frequency::FrequencyTable;
+use crate::parallel;
+use crate::profile::{elapsed_ns, Probe, Timings};
+use crate::readability::Readability;
+use crate::scanner::{Boundary, Counts, Rules, ScanState, Token, Tokenizer};
+use crate::tokens::TokenTable;
+use crate::vocab::Vocab;
+use crate::WordStats;
+
+// Dead words an incremental analysis keeps before it compacts the vocabulary
+const MIN_COMPACT_WORDS: usize = 4096;
+
+#[pyclass(module = "wdlib")]
+#[derive(Debug, Clone)]
+pub struct AnalyzerConfig {
+    #[pyo3(get, set)]
+    pub top_k: usize,
+    #[pyo3(get, set)]
+    pub longest_k: usize,
+    // Validated setter below
+    #[pyo3(get)]
+    pub wpm: f64,
+    #[pyo3(get, set)]
+    pub apostrophes: bool,
+    #[pyo3(get, set)]
+    pub hyphens: bool,
+    // Worker threads for large texts; None uses every core
+    #[pyo3(get)]
+    pub threads: Option<usize>,
+    // Texts of at least this many bytes are analyzed in parallel
+    #[pyo3(get, set)]
+    pub parallel_threshold: usize,
+    // Record stage timings and allocations in WordStats.timings
+    #[pyo3(get, set)]
+    pub timings: bool,
+}
+
+impl Default for AnalyzerConfig {
+    fn default() -> Self {
+        AnalyzerConfig {
+            top_k: 5,
+            longest_k: 5,
+            wpm: 225.0,
+            apostrophes: true,
+            hyphens: true,
+            threads: None,
+            parallel_threshold: 4 * 1024 * 1024,
+            timings: false,
+        }
+    }
+}
+
+impl AnalyzerConfig {
+    pub fn rules(&self) -> Rules {
+        Rules {
+            apostrophes: self.apostrophes,
+            hyphens: self.hyphens,
+        }
+    }
+
+    fn check_wpm(wpm: f64) -> PyResult<f64> {
+        if !(wpm > 0.0) {
+            return Err(PyValueError::new_err("wpm must be positive"));
+        }
+        Ok(wpm)
+    }
+
+    fn check_threads(threads: Option<usize>) -> PyResult<Option<usize>> {
+        if threads == Some(0) {
+            return Err(PyValueError::new_err("threads must be at least 1"));
+        }
+        Ok(threads)
+    }
+
+    pub fn worker_threads(&self) -> usize {
+        self.threads.unwrap_or_else(|| {
+            std::thread::available_parallelism().map(|n| n.get()).unwrap_or(1)
+        })
+    }
+}
+
+#[pymethods]
+impl AnalyzerConfig {
+    #[new]
+    #[pyo3(signature = (
+        top_k=5,
+        longest_k=5,
+        wpm=225.0,
+        apostrophes=true,
+        hyphens=true,
+        threads=None,
+        parallel_threshold=4 * 1024 * 1024,
+        timings=false,
+    ))]
+    fn py_new(
+        top_k: usize,
+        longest_k: usize,
+        wpm: f64,
+        apostrophes: bool,
+        hyphens: bool,
+        threads: Option<usize>,
+        parallel_threshold: usize,
+        timings: bool,
+    ) -> PyResult<Self> {
+        Ok(AnalyzerConfig {
+            top_k,
+            longest_k,
+            wpm: AnalyzerConfig::check_wpm(wpm)?,
+            apostrophes,
+            hyphens,
+            threads: AnalyzerConfig::check_threads(threads)?,
+            parallel_threshold,
+            timings,
+        })
+    }
+
+    // Same checks as the constructor; reading time divides by wpm
+    #[setter]
+    fn set_wpm(&mut self, wpm: f64) -> PyResult<()> {
+        self.wpm = AnalyzerConfig::check_wpm(wpm)?;
+        Ok(())
+    }
+
+    #[setter]
+    fn set_threads(&mut self, threads: Option<usize>) -> PyResult<()> {
+        self.threads = AnalyzerConfig::check_threads(threads)?;
+        Ok(())
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "AnalyzerConfig(top_k={}, longest_k={}, wpm={}, apostrophes={}, hyphens={}, threads={}, parallel_threshold={}, timings={})",
+            self.top_k,
+            self.longest_k,
+            self.wpm,
+            if self.apostrophes { "True" } else { "False" },
+            if self.hyphens { "True" } else { "False" },
+            self.threads.map_or("None".to_string(), |n| n.to_string()),
+            self.parallel_threshold,
+            if self.timings { "True" } else { "False" },
+        )
+    }
+}
+
+// Reusable analysis engine: the tokenizer tables, interned vocabularies and
+// ranking buffers are kept between calls.
+#[pyclass(module = "wdlib")]
+pub struct Analyzer {
+    config: AnalyzerConfig,
+    tokenizer: Tokenizer,
+    vocab: Vocab,
+    shard_vocabs: Vec<Vocab>,
+    order: Vec<u32>,
+}
+
+impl Default for Analyzer {
+    fn default() -> Self {
+        Analyzer::new(AnalyzerConfig::default())
+    }
+}
+
+impl Analyzer {
+    pub fn new(config: AnalyzerConfig) -> Self {
+        Analyzer {
+            tokenizer: Tokenizer::new(config.rules()),
+            config,
+            vocab: Vocab::new(),
+            shard_vocabs: Vec::new(),
+            order: Vec::new(),
+        }
+    }
+
+    pub fn analyze(&mut self, text: &str, cancel: Option<&CancelToken>) -> Result<WordStats, Cancelled> {
+        let mut stats = WordStats::new();
+        self.analyze_into(text, &mut stats, cancel)?;
+        Ok(stats)
+    }
+
+    pub fn analyze_into(
+        &mut self,
+        text: &str,
+        stats: &mut WordStats,
+        cancel: Option<&CancelToken>,
+    ) -> Result<(), Cancelled> {
+        let probe = self.config.timings.then(Probe::start);
+        self.vocab.reset();
+
+        let scan_started = Instant::now();
+        let threads = self.config.worker_threads();
+        let counts = if threads > 1 && text.len() >= self.config.parallel_threshold {
+            parallel::scan_sharded(
+                &self.tokenizer,
+                text,
+                threads,
+                &mut self.shard_vocabs,
+                &mut self.vocab,
+                cancel,
+            )?
+        } else {
+            let vocab = &mut self.vocab;
+            self.tokenizer.scan(text, &mut |token: Token| { vocab.add(token.text); }, cancel)?
+        };
+
+        match probe {
+            Some(probe) => {
+                let mut timings = Timings {
+                    char_count_ns: counts.char_nanos,
+                    scan_ns: elapsed_ns(scan_started),
+                    ..Timings::default()
+                };
+                self.fill(counts, stats, Some(&mut timings));
+                timings.peak_scratch_bytes = self.scratch_bytes() as u64;
+                probe.finish(&mut timings);
+                stats.timings = Some(timings);
+            }
+            None => self.fill(counts, stats, None),
+        }
+        Ok(())
+    }
+
+    // Sequential analysis that also hands every token and its vocabulary id
+    // to `on_token`, in text order; returns the scan counts behind `stats`
+    pub(crate) fn analyze_tokens<F>(
+        &mut self,
+        text: &str,
+        stats: &mut WordStats,
+        cancel: Option<&CancelToken>,
+        mut on_token: F,
+    ) -> Result<Counts, Cancelled>
+    where
+        F: FnMut(&Token<'_>, u32),
+    {
+        self.vocab.reset();
+        let vocab = &mut self.vocab;
+        let counts = self.tokenizer.scan(
+            text,
+            &mut |token: Token| {
+                let id = vocab.add(token.text);
+                on_token(&token, id);
+            },
+            cancel,
+        )?;
+        self.fill(counts, stats, None);
+        Ok(counts)
+    }
+
+    // Sequential scan without word counting, for measures that only need the
+    // tokens and the text counts
+    pub(crate) fn scan_tokens<F>(
+        &self,
+        text: &str,
+        cancel: Option<&CancelToken>,
+        mut on_token: F,
+    ) -> Result<Counts, Cancelled>
+    where
+        F: FnMut(&Token<'_>),
+    {
+        self.tokenizer.scan(text, &mut |token: Token| on_token(&token), cancel)
+    }
+
+    pub fn config(&self) -> &AnalyzerConfig {
+        &self.config
+    }
+
+    pub(crate) fn vocab(&self) -> &Vocab {
+        &self.vocab
+    }
+
+    // Incremental use (StreamingAnalyzer): begin, feed chunks, then finish
+    pub(crate) fn begin(&mut self) {
+        self.vocab.reset();
+    }
+
+    pub(crate) fn feed(
+        &mut self,
+        state: &mut ScanState,
+        chunk: &str,
+        cancel: Option<&CancelToken>,
+    ) -> Result<(), Cancelled> {
+        let vocab = &mut self.vocab;
+        state.feed(&self.tokenizer, chunk, &mut |token: Token| { vocab.add(token.text); }, cancel)
+    }
+
+    pub(crate) fn finish(&mut self, state: &mut ScanState, stats: &mut WordStats) {
+        let vocab = &mut self.vocab;
+        let counts = state.finish(&mut |token: Token| { vocab.add(token.text); });
+        self.fill(counts, stats, None);
+    }
+
+    // Incremental use (IncrementalAnalyzer): one block of a document at a
+    // time, resumed from where the previous block ended; blocks after the
+    // first are joined to it by a newline. Word ids go to `ids`.
+    pub(crate) fn scan_block(
+        &mut self,
+        text: &str,
+        after: Option<Boundary>,
+        ids: &mut Vec<u32>,
+    ) -> (Counts, Boundary) {
+        let vocab = &mut self.vocab;
+        let mut sink = |token: Token| ids.push(vocab.add(token.text));
+        let mut state = match after {
+            Some(boundary) => ScanState::resume(boundary),
+            None => ScanState::new(),
+        };
+        // Without a cancel token the scan always runs to completion
+        if after.is_some() {
+            let _ = state.feed(&self.tokenizer, "\n", &mut sink, None);
+        }
+        let _ = state.feed(&self.tokenizer, text, &mut sink, None);
+        state.suspend(&mut sink)
+    }
+
+    // Takes the words of a block scanned earlier back out of the vocabulary
+    pub(crate) fn unscan_block(&mut self, ids: &[u32]) {
+        for &id in ids {
+            self.vocab.remove(id);
+        }
+    }
+
+    // Drops the words taken back by every block once they outnumber the
+    // words still in use; returns the new id of every old id when it does
+    pub(crate) fn compact_blocks(&mut self) -> Option<Vec<u32>> {
+        let (dead, live) = (self.vocab.dead(), self.vocab.capacity() - self.vocab.dead());
+        (dead > live.max(MIN_COMPACT_WORDS)).then(|| self.vocab.compact())
+    }
+
+    // Stats from document totals and the blocks scanned and not taken back;
+    // `order` lists their words in order of first occurrence
+    pub(crate) fn fill_blocks(&mut self, counts: Counts, order: &[u32], stats: &mut WordStats) {
+        self.vocab.set_ids(order);
+        self.fill(counts, stats, None);
+    }
+
+    fn scratch_bytes(&self) -> usize {
+        self.vocab.scratch_bytes()
+            + self.shard_vocabs.iter().map(Vocab::scratch_bytes).sum::<usize>()
+            + self.order.capacity() * std::mem::size_of::<u32>()
+    }
+
+    // The stats that come from the counts alone, without the vocabulary
+    pub(crate) fn fill_counts(&self, counts: &Counts, stats: &mut WordStats) {
+        stats.characters = counts.characters;
+        stats.characters_no_spaces = counts.characters_no_spaces;
+        stats.paragraphs = counts.paragraphs;
+        stats.sentences = counts.sentences;
+        stats.words = counts.words;
+
+        // Calculate average word length
+        stats.avg_word_length = if stats.words > 0 {
+            counts.letters as f64 / stats.words as f64
+        } else { 0.0 };
+
+        stats.reading_time_seconds = (stats.words as f64 / self.config.wpm * 60.0) as usize;
+    }
+
+    fn fill(&mut self, counts: Counts, stats: &mut WordStats, mut timings: Option<&mut Timings>) {
+        self.fill_counts(&counts, stats);
+        stats.unique_words = self.vocab.len();
+        let started = Instant::now();
+        stats.density = FrequencyTable::from_vocab(&self.vocab);
+        if let Some(timings) = timings.as_deref_mut() {
+            timings.frequency_table_ns = elapsed_ns(started);
+        }
+
+        // Most frequent words (ties keep first-seen order)
+        let started = Instant::now();
+        let vocab = &self.vocab;
+        let ids = vocab.ids();
+        self.order.clear();
+        self.order.extend(0..ids.len() as u32);
+        smallest_k(&mut self.order, self.config.top_k, |&a, &b| {
+            let (a_id, b_id) = (ids[a as usize], ids[b as usize]);
+            vocab.count(b_id).cmp(&vocab.count(a_id)).then(a.cmp(&b))
+        });
+        stats.top_words = self.order.iter()
+            .map(|&pos| ids[pos as usize])
+            .map(|id| (vocab.word(id).to_string(), vocab.count(id)))
+            .collect();
+        if let Some(timings) = timings.as_deref_mut() {
+            timings.top_k_ns = elapsed_ns(started);
+        }
+
+        // Longest words (ties in alphabetical order)
+        let started = Instant::now();
+        self.order.clear();
+        self.order.extend_from_slice(ids);
+        smallest_k(&mut self.order, self.config.longest_k, |&a, &b| {
+            let (a, b) = (vocab.word(a), vocab.word(b));
+            b.len().cmp(&a.len()).then_with(|| a.cmp(b))
+        });
+        stats.longest_words = self.order.iter()
+            .map(|&id| vocab.word(id).to_string())
+            .collect();
+        if let Some(timings) = timings {
+            timings.longest_k_ns = elapsed_ns(started);
+        }
+    }
+}
+
+// Keeps the `k` smallest items under `cmp`, sorted, in O(n + k log k).
+// `cmp` must be a total order for the result to be deterministic.
+pub(crate) fn smallest_k<T, F>(items: &mut Vec<T>, k: usize, mut cmp: F)
+where
+    F: FnMut(&T, &T) -> Ordering,
+{
+    if k == 0 {
+        items.clear();
+        return;
+    }
+    if items.len() > k {
+        items.select_nth_unstable_by(k - 1, &mut cmp);
+        items.truncate(k);
+    }
+    items.sort_unstable_by(cmp);
+}
+
+#[pymethods]
+impl Analyzer {
+    #[new]
+    #[pyo3(signature = (config=None))]
+    fn py_new(config: Option<AnalyzerConfig>) -> Self {
+        Analyzer::new(config.unwrap_or_default())
+    }
+
+    #[getter(config)]
+    fn py_config(&self) -> AnalyzerConfig {
+        self.config.clone()
+    }
+
+    #[pyo3(name = "analyze", signature = (text, cancel=None))]
+    fn py_analyze(&mut self, py: Python<'_>, text: &str, cancel: Option<CancelToken>) -> PyResult<WordStats> {
+        Ok(py.allow_threads(|| self.analyze(text, cancel.as_ref()))?)
+    }
+
+    #[pyo3(name = "readability", signature = (text, cancel=None))]
+    fn py_readability(&self, py: Python<'_>, text: &str, cancel: Option<CancelToken>) -> PyResult<Readability> {
+        Ok(py.allow_threads(|| Readability::measure(self, text, cancel.as_ref()))?)
+    }
+
+    #[pyo3(name = "token_table", signature = (text, cancel=None))]
+    fn py_token_table(&mut self, py: Python<'_>, text: &str, cancel: Option<CancelToken>) -> PyResult<TokenTable> {
+        Ok(py.allow_threads(|| TokenTable::build(self, text, cancel.as_ref()))?)
+    }
+}
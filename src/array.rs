@@ -0,0 +1,190 @@
+// Read-only numeric arrays shared with Python through the buffer protocol, so
+// `memoryview(a)` and `numpy.asarray(a)` see the Rust memory without a copy.
+
+use pyo3::exceptions::PyBufferError;
+use pyo3::ffi;
+use pyo3::prelude::*;
+use pyo3::types::{PyList, PyTuple};
+use std::os::raw::{c_char, c_int, c_void};
+use std::sync::Arc;
+
+#[derive(Debug, Clone)]
+pub enum Column {
+    U32(Arc<[u32]>),
+    U64(Arc<[u64]>),
+    F64(Arc<[f64]>),
+}
+
+impl Column {
+    pub fn len(&self) -> usize {
+        match self {
+            Column::U32(values) => values.len(),
+            Column::U64(values) => values.len(),
+            Column::F64(values) => values.len(),
+        }
+    }
+
+    fn item_size(&self) -> usize {
+        match self {
+            Column::U32(_) => 4,
+            Column::U64(_) | Column::F64(_) => 8,
+        }
+    }
+
+    // struct-module format code, NUL-terminated for Py_buffer.format
+    fn format(&self) -> &'static [u8] {
+        match self {
+            Column::U32(_) => b"I\0",
+            Column::U64(_) => b"Q\0",
+            Column::F64(_) => b"d\0",
+        }
+    }
+
+    fn as_ptr(&self) -> *const c_void {
+        match self {
+            Column::U32(values) => values.as_ptr() as *const c_void,
+            Column::U64(values) => values.as_ptr() as *const c_void,
+            Column::F64(values) => values.as_ptr() as *const c_void,
+        }
+    }
+
+    fn item(&self, py: Python<'_>, index: usize) -> PyObject {
+        match self {
+            Column::U32(values) => values[index].into_py(py),
+            Column::U64(values) => values[index].into_py(py),
+            Column::F64(values) => values[index].into_py(py),
+        }
+    }
+}
+
+impl From<Vec<u32>> for Column {
+    fn from(values: Vec<u32>) -> Self {
+        Column::U32(values.into())
+    }
+}
+
+impl From<Vec<u64>> for Column {
+    fn from(values: Vec<u64>) -> Self {
+        Column::U64(values.into())
+    }
+}
+
+impl From<Vec<f64>> for Column {
+    fn from(values: Vec<f64>) -> Self {
+        Column::F64(values.into())
+    }
+}
+
+// C-contiguous, immutable array of one or two dimensions
+#[pyclass(module = "wdlib")]
+#[derive(Debug, Clone)]
+pub struct NumericArray {
+    column: Column,
+    shape: Vec<isize>,
+    strides: Vec<isize>,
+}
+
+impl NumericArray {
+    pub fn new(column: impl Into<Column>) -> Self {
+        let column = column.into();
+        let len = column.len();
+        NumericArray::with_shape(column, vec![len])
+    }
+
+    pub fn matrix(column: impl Into<Column>, rows: usize, cols: usize) -> Self {
+        NumericArray::with_shape(column.into(), vec![rows, cols])
+    }
+
+    fn with_shape(column: Column, shape: Vec<usize>) -> Self {
+        assert_eq!(shape.iter().product::<usize>(), column.len(), "shape does not match data");
+        let mut strides = vec![column.item_size() as isize; shape.len()];
+        for dim in (0..shape.len().saturating_sub(1)).rev() {
+            strides[dim] = strides[dim + 1] * shape[dim + 1] as isize;
+        }
+        NumericArray {
+            column,
+            shape: shape.into_iter().map(|n| n as isize).collect(),
+            strides,
+        }
+    }
+}
+
+#[pymethods]
+impl NumericArray {
+    fn __len__(&self) -> usize {
+        self.shape[0] as usize
+    }
+
+    #[getter]
+    fn shape<'py>(&self, py: Python<'py>) -> &'py PyTuple {
+        PyTuple::new(py, &self.shape)
+    }
+
+    #[getter]
+    fn format(&self) -> &'static str {
+        let format = self.column.format();
+        std::str::from_utf8(&format[..format.len() - 1]).unwrap()
+    }
+
+    fn tolist<'py>(&self, py: Python<'py>) -> &'py PyList {
+        if self.shape.len() == 1 {
+            return PyList::new(py, (0..self.column.len()).map(|i| self.column.item(py, i)));
+        }
+        let cols = self.shape[1] as usize;
+        PyList::new(
+            py,
+            (0..self.shape[0] as usize).map(|row| {
+                PyList::new(py, (row * cols..(row + 1) * cols).map(|i| self.column.item(py, i)))
+            }),
+        )
+    }
+
+    fn __repr__(&self) -> String {
+        let shape: Vec<String> = self.shape.iter().map(|n| n.to_string()).collect();
+        format!("NumericArray(shape=({}{}), format={:?})",
+            shape.join(", "),
+            if shape.len() == 1 { "," } else { "" },
+            self.format())
+    }
+
+    unsafe fn __getbuffer__(slf: &PyCell<Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        if view.is_null() {
+            return Err(PyBufferError::new_err("view is null"));
+        }
+        if flags & ffi::PyBUF_WRITABLE == ffi::PyBUF_WRITABLE {
+            return Err(PyBufferError::new_err("NumericArray is read-only"));
+        }
+        let array = slf.borrow();
+        let item_size = array.column.item_size() as isize;
+
+        // shape and strides point into the array, which never changes and is
+        // kept alive by the view's reference in `obj`
+        ffi::Py_INCREF(slf.as_ptr());
+        (*view).obj = slf.as_ptr();
+        (*view).buf = array.column.as_ptr() as *mut c_void;
+        (*view).len = array.column.len() as isize * item_size;
+        (*view).readonly = 1;
+        (*view).itemsize = item_size;
+        (*view).format = if flags & ffi::PyBUF_FORMAT == ffi::PyBUF_FORMAT {
+            array.column.format().as_ptr() as *mut c_char
+        } else {
+            std::ptr::null_mut()
+        };
+        // Without PyBUF_ND the consumer sees a flat run of bytes
+        if flags & ffi::PyBUF_ND == ffi::PyBUF_ND {
+            (*view).ndim = array.shape.len() as c_int;
+            (*view).shape = array.shape.as_ptr() as *mut isize;
+        } else {
+            (*view).ndim = 1;
+            (*view).shape = std::ptr::null_mut();
+        }
+        (*view).strides = if flags & ffi::PyBUF_STRIDES == ffi::PyBUF_STRIDES {
+            array.strides.as_ptr() as *mut isize
+        } else {
+            std::ptr::null_mut()
+        };
+        (*view).suboffsets = std::ptr::null_mut();
+        (*view).internal = std::ptr::null_mut();
+        Ok(())
+    }
+}
@@ -0,0 +1,79 @@
+// Batch analysis of many small documents.
+//
+// Every worker thread owns one warm Analyzer and claims documents in small
+// batches from a shared cursor, so uneven document sizes balance out.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::thread;
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::cancel::{CancelToken, Cancelled};
+use crate::WordStats;
+
+// Documents claimed per trip to the shared cursor
+const CLAIM_SIZE: usize = 16;
+
+pub fn analyze_batch(
+    texts: &[&str],
+    config: &AnalyzerConfig,
+    cancel: Option<&CancelToken>,
+) -> Result<Vec<WordStats>, Cancelled> {
+    let threads = config.worker_threads().min(texts.len()).max(1);
+    // Parallelism comes from the batch; each document is scanned on one thread
+    let document_config = AnalyzerConfig { threads: Some(1), ..config.clone() };
+    let cursor = AtomicUsize::new(0);
+
+    let finished: Vec<Result<Vec<(usize, WordStats)>, Cancelled>> = thread::scope(|scope| {
+        let workers: Vec<_> = (0..threads)
+            .map(|_| {
+                scope.spawn(|| {
+                    let mut analyzer = Analyzer::new(document_config.clone());
+                    let mut done = Vec::new();
+                    loop {
+                        let start = cursor.fetch_add(CLAIM_SIZE, Ordering::Relaxed);
+                        if start >= texts.len() {
+                            return Ok(done);
+                        }
+                        let end = (start + CLAIM_SIZE).min(texts.len());
+                        for (index, text) in texts[start..end].iter().enumerate() {
+                            done.push((start + index, analyzer.analyze(text, cancel)?));
+                        }
+                    }
+                })
+            })
+            .collect();
+        workers
+            .into_iter()
+            .map(|worker| worker.join().expect("batch worker panicked"))
+            .collect()
+    });
+
+    let mut results: Vec<Option<WordStats>> = (0..texts.len()).map(|_| None).collect();
+    for done in finished {
+        for (index, stats) in done? {
+            results[index] = Some(stats);
+        }
+    }
+    Ok(results.into_iter().map(|stats| stats.expect("document skipped")).collect())
+}
+
+#[pyfunction]
+#[pyo3(signature = (texts, threads=None, config=None, cancel=None))]
+pub fn analyze_many(
+    py: Python<'_>,
+    texts: Vec<&str>,
+    threads: Option<usize>,
+    config: Option<AnalyzerConfig>,
+    cancel: Option<CancelToken>,
+) -> PyResult<Vec<WordStats>> {
+    if threads == Some(0) {
+        return Err(PyValueError::new_err("threads must be at least 1"));
+    }
+    let mut config = config.unwrap_or_default();
+    if threads.is_some() {
+        config.threads = threads;
+    }
+    Ok(py.allow_threads(|| analyze_batch(&texts, &config, cancel.as_ref()))?)
+}
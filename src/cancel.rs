@@ -0,0 +1,48 @@
+use pyo3::prelude::*;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
+
+// Returned by the engine when its CancelToken was tripped mid-analysis
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct Cancelled;
+
+// Shared flag the Python side can trip while the analysis runs without the GIL
+#[pyclass(module = "wdlib")]
+#[derive(Debug, Clone, Default)]
+pub struct CancelToken {
+    flag: Arc<AtomicBool>,
+}
+
+impl CancelToken {
+    pub fn is_cancelled(&self) -> bool {
+        self.flag.load(Ordering::Relaxed)
+    }
+
+    pub fn check(token: Option<&CancelToken>) -> Result<(), Cancelled> {
+        match token {
+            Some(token) if token.is_cancelled() => Err(Cancelled),
+            _ => Ok(()),
+        }
+    }
+}
+
+#[pymethods]
+impl CancelToken {
+    #[new]
+    pub fn new() -> Self {
+        CancelToken::default()
+    }
+
+    pub fn cancel(&self) {
+        self.flag.store(true, Ordering::Relaxed);
+    }
+
+    #[getter]
+    fn cancelled(&self) -> bool {
+        self.is_cancelled()
+    }
+
+    fn __repr__(&self) -> String {
+        format!("CancelToken(cancelled={})", if self.is_cancelled() { "True" } else { "False" })
+    }
+}
@@ -0,0 +1,163 @@
+// Vectorized character counting.
+//
+// Characters are the UTF-8 bytes that are not continuation bytes, ASCII
+// whitespace and newlines are byte-class matches. The only non-ASCII work is
+// decoding characters whose lead byte can start a Unicode space
+// (U+0085, U+00A0, U+1680, U+2000..U+205F, U+3000), and only in blocks that
+// contain a non-ASCII byte at all.
+
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct CharCounts {
+    pub characters: usize,
+    // Characters with the Unicode White_Space property
+    pub whitespace: usize,
+    pub newlines: usize,
+}
+
+impl CharCounts {
+    pub fn characters_no_spaces(&self) -> usize {
+        self.characters - self.whitespace
+    }
+}
+
+const BLOCK: usize = 16;
+
+// Non-ASCII whitespace in a block that contains bytes >= 0x80
+fn unicode_spaces(text: &str, start: usize, end: usize) -> usize {
+    let bytes = text.as_bytes();
+    (start..end)
+        .filter(|&i| matches!(bytes[i], 0xC2 | 0xE1 | 0xE2 | 0xE3))
+        .filter(|&i| text[i..].chars().next().map_or(false, char::is_whitespace))
+        .count()
+}
+
+fn count_scalar(bytes: &[u8], counts: &mut CharCounts) {
+    for &b in bytes {
+        counts.characters += (b & 0xC0 != 0x80) as usize;
+        counts.whitespace += matches!(b, b'\t'..=b'\r' | b' ') as usize;
+        counts.newlines += (b == b'\n') as usize;
+    }
+}
+
+#[cfg(target_arch = "x86_64")]
+fn count_blocks(text: &str, counts: &mut CharCounts) -> usize {
+    use std::arch::x86_64::*;
+
+    let bytes = text.as_bytes();
+    let blocks = bytes.len() / BLOCK;
+    // SAFETY: SSE2 is part of the x86_64 baseline and every load reads 16
+    // bytes inside `bytes`.
+    unsafe {
+        let continuation = _mm_set1_epi8(-65); // bytes above 0xBF (as i8) are not 10xxxxxx
+        let tab = _mm_set1_epi8(b'\t' as i8);
+        let flip = _mm_set1_epi8(-128);
+        let control_limit = _mm_set1_epi8(-123); // '\t'..='\r' after shifting and flipping
+        let space = _mm_set1_epi8(b' ' as i8);
+        let newline = _mm_set1_epi8(b'\n' as i8);
+
+        for block in 0..blocks {
+            let start = block * BLOCK;
+            let v = _mm_loadu_si128(bytes.as_ptr().add(start) as *const __m128i);
+            let chars = _mm_movemask_epi8(_mm_cmpgt_epi8(v, continuation));
+            let controls = _mm_cmplt_epi8(_mm_xor_si128(_mm_sub_epi8(v, tab), flip), control_limit);
+            let spaces = _mm_movemask_epi8(_mm_or_si128(controls, _mm_cmpeq_epi8(v, space)));
+            let newlines = _mm_movemask_epi8(_mm_cmpeq_epi8(v, newline));
+            counts.characters += chars.count_ones() as usize;
+            counts.whitespace += spaces.count_ones() as usize;
+            counts.newlines += newlines.count_ones() as usize;
+            if _mm_movemask_epi8(v) != 0 {
+                counts.whitespace += unicode_spaces(text, start, start + BLOCK);
+            }
+        }
+    }
+    blocks * BLOCK
+}
+
+// SWAR fallback: eight bytes per step in a u64
+#[cfg(not(target_arch = "x86_64"))]
+fn count_blocks(text: &str, counts: &mut CharCounts) -> usize {
+    const LOW: u64 = 0x0101_0101_0101_0101;
+    const HIGH: u64 = 0x8080_8080_8080_8080;
+
+    // High bit set in every byte of `x` that is zero
+    fn zero_bytes(x: u64) -> u64 {
+        !(((x & !HIGH) + !HIGH) | x) & HIGH
+    }
+
+    let bytes = text.as_bytes();
+    let blocks = bytes.len() / BLOCK;
+    for block in 0..blocks {
+        let start = block * BLOCK;
+        let mut ascii = true;
+        for half in bytes[start..start + BLOCK].chunks_exact(8) {
+            let x = u64::from_le_bytes(half.try_into().unwrap());
+            // Continuation bytes are 10xxxxxx
+            let continuation = x & !(x << 1) & HIGH;
+            counts.characters += 8 - continuation.count_ones() as usize;
+            let mut spaces = zero_bytes(x ^ (LOW * b' ' as u64));
+            for b in b'\t'..=b'\r' {
+                spaces |= zero_bytes(x ^ (LOW * b as u64));
+            }
+            counts.whitespace += spaces.count_ones() as usize;
+            counts.newlines += zero_bytes(x ^ (LOW * b'\n' as u64)).count_ones() as usize;
+            ascii &= x & HIGH == 0;
+        }
+        if !ascii {
+            counts.whitespace += unicode_spaces(text, start, start + BLOCK);
+        }
+    }
+    blocks * BLOCK
+}
+
+pub fn count_chars(text: &str) -> CharCounts {
+    let mut counts = CharCounts::default();
+    let done = count_blocks(text, &mut counts);
+    count_scalar(&text.as_bytes()[done..], &mut counts);
+    counts.whitespace += unicode_spaces(text, done, text.len());
+    counts
+}
+
+#[pyfunction]
+pub fn count_characters<'py>(py: Python<'py>, text: &str) -> PyResult<&'py PyDict> {
+    let counts = count_chars(text);
+    let dict = PyDict::new(py);
+    dict.set_item("characters", counts.characters)?;
+    dict.set_item("characters_no_spaces", counts.characters_no_spaces())?;
+    dict.set_item("newlines", counts.newlines)?;
+    Ok(dict)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn reference(text: &str) -> CharCounts {
+        CharCounts {
+            characters: text.chars().count(),
+            whitespace: text.chars().filter(|c| c.is_whitespace()).count(),
+            newlines: text.matches('\n').count(),
+        }
+    }
+
+    #[test]
+    fn matches_char_iteration() {
+        let pieces = [
+            "a", " ", "\t", "\n", "\r\n", "\u{b}", "\u{c}", "\u{85}", "\u{a0}", "\u{1680}",
+            "\u{2003}", "\u{2028}", "\u{202f}", "\u{3000}", "é", "日本", "🎉", "\u{1c}", "¬",
+        ];
+        let mut seed = 0x2545_f491_4f6c_dd1d_u64;
+        for len in 0..400 {
+            let mut text = String::new();
+            for _ in 0..len {
+                seed ^= seed << 13;
+                seed ^= seed >> 7;
+                seed ^= seed << 17;
+                text.push_str(pieces[(seed % pieces.len() as u64) as usize]);
+            }
+            assert_eq!(count_chars(&text), reference(&text), "{:?}", text);
+        }
+    }
+}
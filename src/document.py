@@ -0,0 +1,119 @@
+"""
+WD - Document snapshots
+The text of one document revision and everything derived from it, computed once on demand
+"""
+
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from src.letters import NON_ASCII_LETTERS
+
+try:
+    import wdlib
+    HAS_RUST = True
+except ImportError:
+    HAS_RUST = False
+
+# Fallback tokenizer for when the Rust backend is missing, with the scanner's
+# rules: runs of letters with inner apostrophes, joined by single hyphens;
+# leading/trailing apostrophes and hyphens are dropped
+_LETTER = rf"[a-zA-Z{NON_ASCII_LETTERS}]"
+WORD_PATTERN = re.compile(rf"{_LETTER}+(?:(?:'|-(?!-))+{_LETTER}+)*")
+
+# Whitespace as Rust sees it: Python's \s without the ASCII separators \x1c-\x1f
+_SPACE = r"[^\S\x1c-\x1f]"
+_CONTENT = re.compile(r"[\S\x1c-\x1f]")
+
+# A sentence ends at a run of terminators followed by whitespace; a run at
+# the very end is ordinary content
+SENTENCE_END = re.compile(rf"[.!?]+(?={_SPACE})")
+
+
+class DocumentSnapshot:
+    """Text of one document revision and its derived artifacts
+
+    Built from a single copy of the text; the token table, vocabulary and
+    sentence index are computed on first use and shared by every consumer of
+    the revision, on any thread. With the Rust backend the words come from
+    one wdlib.TokenTable, otherwise from WORD_PATTERN. Never modified after
+    creation, so racing first uses at worst compute an artifact twice.
+    """
+
+    def __init__(self, text: str, revision: int = 0):
+        self.text = text
+        self.revision = revision
+        self._table = None
+        self._words: Optional[List[str]] = None
+        self._starts: Optional[List[int]] = None
+        self._vocabulary: Optional[Counter] = None
+        self._sentences: Optional[List[Tuple[int, int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def is_blank(self) -> bool:
+        return not self.text.strip()
+
+    def tokens(self, cancel=None):
+        """The wdlib.TokenTable of the text, or None without the Rust backend
+
+        Raises wdlib.Cancelled if `cancel` fires while the table is built.
+        """
+        if self._table is None and HAS_RUST:
+            self._table = wdlib.token_table(self.text, cancel=cancel)
+        return self._table
+
+    def _tokenize(self):
+        table = self.tokens()
+        if table is not None:
+            names = table.words.words
+            words = [names[word_id] for word_id in table.word_ids.tolist()]
+            starts = table.starts.tolist()
+        else:
+            words, starts = [], []
+            for match in WORD_PATTERN.finditer(self.text):
+                words.append(match.group().lower())
+                starts.append(match.start())
+        self._starts = starts
+        self._words = words
+
+    @property
+    def words(self) -> List[str]:
+        """Lowercase words in document order"""
+        if self._words is None:
+            self._tokenize()
+        return self._words
+
+    @property
+    def word_starts(self) -> List[int]:
+        """Offset of every word in the text, parallel to words"""
+        if self._starts is None:
+            self._tokenize()
+        return self._starts
+
+    @property
+    def vocabulary(self) -> Counter:
+        """Word -> count, in order of first occurrence"""
+        if self._vocabulary is None:
+            table = self.tokens()
+            if table is not None:
+                self._vocabulary = Counter(dict(zip(table.words.words, table.words.counts.tolist())))
+            else:
+                self._vocabulary = Counter(self.words)
+        return self._vocabulary
+
+    @property
+    def sentences(self) -> List[Tuple[int, int]]:
+        """(start, end) offsets of every sentence with content"""
+        if self._sentences is None:
+            sentences = []
+            start = 0
+            for match in SENTENCE_END.finditer(self.text):
+                if _CONTENT.search(self.text, start, match.start()):
+                    sentences.append((start, match.end()))
+                start = match.end()
+            if _CONTENT.search(self.text, start):
+                sentences.append((start, len(self.text)))
+            self._sentences = sentences
+        return self._sentences
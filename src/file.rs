@@ -0,0 +1,136 @@
+// Analysis of files straight from a memory map, without building a Python str.
+// Invalid UTF-8 is decoded lossily by the streaming analyzer, straight from
+// the map, rather than into a repaired copy of the whole file.
+
+use memmap2::Mmap;
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use std::fs::File;
+use std::io;
+use std::path::{Path, PathBuf};
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::cancel::{CancelToken, Cancelled};
+use crate::stream::StreamingAnalyzer;
+use crate::WordStats;
+
+const UTF8_BOM: &[u8] = b"\xEF\xBB\xBF";
+
+#[derive(Debug)]
+pub enum FileError {
+    Io(io::Error),
+    InvalidUtf8 { offset: usize },
+    Cancelled,
+}
+
+impl From<io::Error> for FileError {
+    fn from(err: io::Error) -> Self {
+        FileError::Io(err)
+    }
+}
+
+impl From<Cancelled> for FileError {
+    fn from(_: Cancelled) -> Self {
+        FileError::Cancelled
+    }
+}
+
+pub fn analyze_bytes(
+    analyzer: &mut Analyzer,
+    bytes: &[u8],
+    lossy: bool,
+    cancel: Option<&CancelToken>,
+) -> Result<WordStats, FileError> {
+    match std::str::from_utf8(bytes) {
+        Ok(text) => Ok(analyzer.analyze(text, cancel)?),
+        Err(err) if !lossy => Err(FileError::InvalidUtf8 { offset: err.valid_up_to() }),
+        Err(_) => {
+            let mut stream = StreamingAnalyzer::new(analyzer.config().clone());
+            stream.feed_bytes(bytes, cancel)?;
+            Ok(stream.finish())
+        }
+    }
+}
+
+pub fn analyze_path(
+    analyzer: &mut Analyzer,
+    path: &Path,
+    strip_bom: bool,
+    lossy: bool,
+    cancel: Option<&CancelToken>,
+) -> Result<WordStats, FileError> {
+    let file = File::open(path)?;
+    if file.metadata()?.len() == 0 {
+        return analyze_bytes(analyzer, b"", lossy, cancel);
+    }
+
+    // The map is only read while this call runs; a concurrent truncation of
+    // the file by another process is outside what we can guard against.
+    let map = unsafe { Mmap::map(&file)? };
+    let skip = if strip_bom && map.starts_with(UTF8_BOM) { UTF8_BOM.len() } else { 0 };
+    match analyze_bytes(analyzer, &map[skip..], lossy, cancel) {
+        Err(FileError::InvalidUtf8 { offset }) => Err(FileError::InvalidUtf8 { offset: offset + skip }),
+        result => result,
+    }
+}
+
+#[pyfunction]
+#[pyo3(signature = (path, encoding="utf-8", errors="replace", config=None, cancel=None))]
+pub fn analyze_file(
+    py: Python<'_>,
+    path: PathBuf,
+    encoding: &str,
+    errors: &str,
+    config: Option<AnalyzerConfig>,
+    cancel: Option<CancelToken>,
+) -> PyResult<WordStats> {
+    let strip_bom = match encoding.to_ascii_lowercase().replace('_', "-").as_str() {
+        "utf-8" | "utf8" => false,
+        "utf-8-sig" | "utf8-sig" => true,
+        _ => {
+            return Err(PyValueError::new_err(format!(
+                "unsupported encoding {:?}; analyze_file reads UTF-8 only",
+                encoding
+            )))
+        }
+    };
+    let lossy = match errors {
+        "replace" => true,
+        "strict" => false,
+        _ => return Err(PyValueError::new_err("errors must be 'replace' or 'strict'")),
+    };
+
+    let mut analyzer = Analyzer::new(config.unwrap_or_default());
+    let result = py.allow_threads(|| {
+        analyze_path(&mut analyzer, &path, strip_bom, lossy, cancel.as_ref())
+    });
+    match result {
+        Ok(stats) => Ok(stats),
+        Err(FileError::Io(err)) => Err(err.into()),
+        Err(FileError::Cancelled) => Err(Cancelled.into()),
+        Err(FileError::InvalidUtf8 { offset }) => Err(PyValueError::new_err(format!(
+            "{}: invalid UTF-8 at byte {}",
+            path.display(),
+            offset
+        ))),
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn lossy_bytes_match_a_lossy_copy() {
+        let bytes = b"caf\xC3\xA9 bad\xFF byte\xE2\x82 cut. Sentence two \xF0\x9F\x98";
+        let mut analyzer = Analyzer::default();
+        let stats = analyze_bytes(&mut analyzer, bytes, true, None).unwrap();
+        let mut copy = analyzer.analyze(&String::from_utf8_lossy(bytes), None).unwrap();
+        copy.invalid_utf8_sequences = 3;
+        assert_eq!(stats.to_json(), copy.to_json());
+        assert!(matches!(
+            analyze_bytes(&mut analyzer, bytes, false, None),
+            Err(FileError::InvalidUtf8 { offset: 9 })
+        ));
+    }
+}
@@ -0,0 +1,284 @@
+// Full word frequency table of one analysis, stored as parallel columns in
+// first-seen order. Words are copied back to back into one buffer and only
+// become Python strings when asked for.
+
+use hashbrown::HashTable;
+use once_cell::sync::OnceCell;
+use pyo3::exceptions::{PyIndexError, PyKeyError};
+use pyo3::prelude::*;
+use pyo3::types::PyList;
+use rustc_hash::FxBuildHasher;
+use std::hash::BuildHasher;
+use std::sync::Arc;
+
+use crate::analyzer::smallest_k;
+use crate::array::{Column, NumericArray};
+use crate::vocab::Vocab;
+
+#[derive(Debug, Default)]
+struct Columns {
+    // All words concatenated; word i ends at ends[i]
+    text: String,
+    ends: Vec<usize>,
+    counts: Arc<[u64]>,
+    total: u64,
+    // Indices hashed by word, built on the first lookup
+    index: OnceCell<HashTable<u32>>,
+}
+
+impl Columns {
+    fn word(&self, index: usize) -> &str {
+        let start = if index == 0 { 0 } else { self.ends[index - 1] };
+        &self.text[start..self.ends[index]]
+    }
+
+    fn words(&self) -> impl Iterator<Item = &str> {
+        (0..self.ends.len()).map(|index| self.word(index))
+    }
+}
+
+#[pyclass(module = "wdlib")]
+#[derive(Debug, Clone, Default)]
+pub struct FrequencyTable {
+    columns: Arc<Columns>,
+}
+
+impl FrequencyTable {
+    pub fn from_vocab(vocab: &Vocab) -> Self {
+        let ids = vocab.ids();
+        let mut text = String::with_capacity(ids.iter().map(|&id| vocab.word(id).len()).sum());
+        let mut ends = Vec::with_capacity(ids.len());
+        for &id in ids {
+            text.push_str(vocab.word(id));
+            ends.push(text.len());
+        }
+        let counts: Vec<u64> = ids.iter().map(|&id| vocab.count(id) as u64).collect();
+        let total = counts.iter().sum();
+        FrequencyTable {
+            columns: Arc::new(Columns {
+                text,
+                ends,
+                counts: counts.into(),
+                total,
+                index: OnceCell::new(),
+            }),
+        }
+    }
+
+    pub fn len(&self) -> usize {
+        self.columns.ends.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.columns.ends.is_empty()
+    }
+
+    pub fn word(&self, index: usize) -> &str {
+        self.columns.word(index)
+    }
+
+    pub fn count(&self, index: usize) -> u64 {
+        self.columns.counts[index]
+    }
+
+    pub fn total(&self) -> u64 {
+        self.columns.total
+    }
+
+    pub fn lookup(&self, word: &str) -> Option<usize> {
+        let columns = &*self.columns;
+        let index = columns.index.get_or_init(|| {
+            let mut index = HashTable::with_capacity(self.len());
+            for (i, word) in columns.words().enumerate() {
+                // Words of one table are distinct
+                index.insert_unique(FxBuildHasher.hash_one(word), i as u32, |&i| {
+                    FxBuildHasher.hash_one(columns.word(i as usize))
+                });
+            }
+            index
+        });
+        index
+            .find(FxBuildHasher.hash_one(word), |&i| columns.word(i as usize) == word)
+            .map(|&i| i as usize)
+    }
+
+    // Indices by count descending; ties keep first-seen order
+    pub fn ranked(&self, n: usize) -> Vec<usize> {
+        let counts = &self.columns.counts;
+        let mut order: Vec<usize> = (0..counts.len()).collect();
+        smallest_k(&mut order, n, |&a, &b| counts[b].cmp(&counts[a]).then(a.cmp(&b)));
+        order
+    }
+}
+
+#[pymethods]
+impl FrequencyTable {
+    fn __len__(&self) -> usize {
+        self.len()
+    }
+
+    // Number of words counted, i.e. the sum of `counts`
+    #[getter(total)]
+    fn py_total(&self) -> u64 {
+        self.total()
+    }
+
+    #[getter]
+    fn words<'py>(&self, py: Python<'py>) -> &'py PyList {
+        PyList::new(py, self.columns.words())
+    }
+
+    #[getter]
+    fn counts(&self) -> NumericArray {
+        NumericArray::new(Column::U64(self.columns.counts.clone()))
+    }
+
+    // Share of all words for every entry, in the same order as `words`
+    #[getter]
+    fn densities(&self) -> NumericArray {
+        let total = self.total().max(1) as f64;
+        NumericArray::new(self.columns.counts.iter().map(|&n| n as f64 / total).collect::<Vec<_>>())
+    }
+
+    #[pyo3(name = "word")]
+    fn py_word(&self, index: usize) -> PyResult<&str> {
+        (index < self.len()).then(|| self.word(index))
+            .ok_or_else(|| PyIndexError::new_err("index out of range"))
+    }
+
+    #[pyo3(name = "count")]
+    fn py_count(&self, index: usize) -> PyResult<u64> {
+        self.columns.counts.get(index).copied()
+            .ok_or_else(|| PyIndexError::new_err("index out of range"))
+    }
+
+    #[pyo3(signature = (n=None))]
+    fn most_common(&self, n: Option<usize>) -> Vec<(&str, u64)> {
+        self.ranked(n.unwrap_or(self.len()))
+            .into_iter()
+            .map(|index| (self.word(index), self.count(index)))
+            .collect()
+    }
+
+    // Mapping view (word -> count) over this table
+    fn vocabulary(&self) -> Vocabulary {
+        Vocabulary::new(self.clone())
+    }
+
+    fn __repr__(&self) -> String {
+        format!("FrequencyTable(words={}, total={})", self.len(), self.total())
+    }
+}
+
+// Read-only `Mapping[str, int]` from lowercase word to count. Registered as a
+// collections.abc.Mapping; entries become Python objects only when accessed.
+#[pyclass(module = "wdlib", mapping)]
+#[derive(Debug, Clone)]
+pub struct Vocabulary {
+    table: FrequencyTable,
+}
+
+impl Vocabulary {
+    pub fn new(table: FrequencyTable) -> Self {
+        Vocabulary { table }
+    }
+
+    fn iter(&self, kind: IterKind) -> VocabularyIter {
+        VocabularyIter { table: self.table.clone(), kind, next: 0 }
+    }
+}
+
+#[derive(Debug, Clone, Copy)]
+enum IterKind {
+    Keys,
+    Values,
+    Items,
+}
+
+#[pyclass(module = "wdlib")]
+pub struct VocabularyIter {
+    table: FrequencyTable,
+    kind: IterKind,
+    next: usize,
+}
+
+#[pymethods]
+impl VocabularyIter {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(&mut self, py: Python<'_>) -> Option<PyObject> {
+        if self.next >= self.table.len() {
+            return None;
+        }
+        let index = self.next;
+        self.next += 1;
+        let (word, count) = (self.table.word(index), self.table.count(index));
+        Some(match self.kind {
+            IterKind::Keys => word.into_py(py),
+            IterKind::Values => count.into_py(py),
+            IterKind::Items => (word, count).into_py(py),
+        })
+    }
+
+    fn __length_hint__(&self) -> usize {
+        self.table.len() - self.next
+    }
+}
+
+#[pymethods]
+impl Vocabulary {
+    fn __len__(&self) -> usize {
+        self.table.len()
+    }
+
+    fn __getitem__(&self, word: &str) -> PyResult<u64> {
+        match self.table.lookup(word) {
+            Some(index) => Ok(self.table.count(index)),
+            None => Err(PyKeyError::new_err(word.to_string())),
+        }
+    }
+
+    fn __contains__(&self, word: &PyAny) -> bool {
+        match word.extract::<&str>() {
+            Ok(word) => self.table.lookup(word).is_some(),
+            Err(_) => false,
+        }
+    }
+
+    fn __iter__(&self) -> VocabularyIter {
+        self.keys()
+    }
+
+    #[pyo3(signature = (word, default=None))]
+    fn get(&self, py: Python<'_>, word: &PyAny, default: Option<PyObject>) -> PyObject {
+        let index = word.extract::<&str>().ok().and_then(|word| self.table.lookup(word));
+        match index {
+            Some(index) => self.table.count(index).into_py(py),
+            None => default.unwrap_or_else(|| py.None()),
+        }
+    }
+
+    fn keys(&self) -> VocabularyIter {
+        self.iter(IterKind::Keys)
+    }
+
+    fn values(&self) -> VocabularyIter {
+        self.iter(IterKind::Values)
+    }
+
+    fn items(&self) -> VocabularyIter {
+        self.iter(IterKind::Items)
+    }
+
+    // Same order as Counter.most_common: count descending, then first seen
+    #[pyo3(signature = (n=None))]
+    fn most_common(&self, n: Option<usize>) -> Vec<(&str, u64)> {
+        self.table.most_common(n)
+    }
+
+    fn __repr__(&self) -> String {
+        format!("Vocabulary(words={})", self.table.len())
+    }
+}
@@ -0,0 +1,352 @@
+// Incremental analysis of a document edited in place.
+//
+// The document is a list of blocks joined by newlines, the way QTextDocument
+// stores paragraphs. Every block keeps its text, its counts, the vocabulary
+// ids of its words and the scanner state it starts and ends in. An edit
+// replaces a run of blocks: only those are scanned, and a following block
+// only when the state it starts in has changed (an open sentence or
+// paragraph running across the newline). Totals and word counts are updated
+// by taking the old blocks out and adding the new ones. Words are listed in
+// order of first occurrence, which breaks ties between equally frequent top
+// words; that order is rebuilt from the first block edited since the last
+// `stats`. Words no block holds any more (every prefix of a word being
+// typed) are dropped from the vocabulary once they outnumber the live ones.
+// The result is the same as analyzing the joined text from scratch.
+
+use pyo3::exceptions::PyIndexError;
+use pyo3::prelude::*;
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::scanner::{Boundary, Counts};
+use crate::WordStats;
+
+#[derive(Debug, Default)]
+struct Block {
+    text: String,
+    // None for the first block of the document
+    start: Option<Boundary>,
+    end: Boundary,
+    counts: Counts,
+    ids: Vec<u32>,
+    // Length of `IncrementalAnalyzer::order` through this block
+    order_end: usize,
+}
+
+fn add(totals: &mut Counts, counts: &Counts) {
+    totals.characters += counts.characters;
+    totals.characters_no_spaces += counts.characters_no_spaces;
+    totals.paragraphs += counts.paragraphs;
+    totals.sentences += counts.sentences;
+    totals.words += counts.words;
+    totals.letters += counts.letters;
+}
+
+fn subtract(totals: &mut Counts, counts: &Counts) {
+    totals.characters -= counts.characters;
+    totals.characters_no_spaces -= counts.characters_no_spaces;
+    totals.paragraphs -= counts.paragraphs;
+    totals.sentences -= counts.sentences;
+    totals.words -= counts.words;
+    totals.letters -= counts.letters;
+}
+
+#[pyclass(module = "wdlib")]
+pub struct IncrementalAnalyzer {
+    analyzer: Analyzer,
+    blocks: Vec<Block>,
+    // Sum of the block counts
+    totals: Counts,
+    // Vocabulary ids by first occurrence, up to the end of block `ordered - 1`
+    order: Vec<u32>,
+    ordered: usize,
+    // Whether a vocabulary id is in `order`
+    placed: Vec<bool>,
+}
+
+impl IncrementalAnalyzer {
+    pub fn new(config: AnalyzerConfig) -> Self {
+        let mut incremental = IncrementalAnalyzer {
+            analyzer: Analyzer::new(config),
+            blocks: Vec::new(),
+            totals: Counts::default(),
+            order: Vec::new(),
+            ordered: 0,
+            placed: Vec::new(),
+        };
+        incremental.set_text("");
+        incremental
+    }
+
+    // Starts over with `text`, split into blocks at newlines
+    pub fn set_text(&mut self, text: &str) {
+        self.blocks.clear();
+        self.totals = Counts::default();
+        // Starting over may renumber the vocabulary
+        self.order.clear();
+        self.ordered = 0;
+        self.placed.clear();
+        self.analyzer.begin();
+        self.splice(0, 0, text.split('\n').map(str::to_string));
+    }
+
+    // Replaces blocks first..first + removed with `texts` and rescans what
+    // the edit affects. Panics if the range is out of bounds.
+    pub fn splice<I>(&mut self, first: usize, removed: usize, texts: I)
+    where
+        I: IntoIterator<Item = String>,
+    {
+        for index in first..first + removed {
+            self.take(index);
+        }
+        self.ordered = self.ordered.min(first);
+        let before = self.blocks.len();
+        let new = texts.into_iter().map(|text| Block { text, ..Block::default() });
+        self.blocks.splice(first..first + removed, new);
+        let inserted_end = first + self.blocks.len() + removed - before;
+
+        // The new blocks, then the following ones until one starts in the
+        // state it was scanned in
+        for index in first..self.blocks.len() {
+            let start = if index == 0 { None } else { Some(self.blocks[index - 1].end) };
+            if index >= inserted_end {
+                if self.blocks[index].start == start {
+                    break;
+                }
+                self.take(index);
+            }
+            self.scan(index, start);
+        }
+        self.compact();
+    }
+
+    fn compact(&mut self) {
+        if let Some(remap) = self.analyzer.compact_blocks() {
+            for block in &mut self.blocks {
+                for id in &mut block.ids {
+                    *id = remap[*id as usize];
+                }
+            }
+            // Ids changed; the order is found again on the next `stats`
+            self.order.clear();
+            self.ordered = 0;
+            self.placed.clear();
+        }
+    }
+
+    fn take(&mut self, index: usize) {
+        let block = &self.blocks[index];
+        subtract(&mut self.totals, &block.counts);
+        self.analyzer.unscan_block(&block.ids);
+    }
+
+    fn scan(&mut self, index: usize, start: Option<Boundary>) {
+        let block = &mut self.blocks[index];
+        block.ids.clear();
+        let (counts, end) = self.analyzer.scan_block(&block.text, start, &mut block.ids);
+        block.start = start;
+        block.end = end;
+        block.counts = counts;
+        add(&mut self.totals, &counts);
+    }
+
+    pub fn len(&self) -> usize {
+        self.blocks.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.blocks.is_empty()
+    }
+
+    fn counts(&self) -> Counts {
+        let mut counts = self.totals;
+        if let Some(last) = self.blocks.last() {
+            let (paragraphs, sentences) = last.end.closing();
+            counts.paragraphs += paragraphs;
+            counts.sentences += sentences;
+        }
+        counts
+    }
+
+    // Brings `order` up to date: first occurrences in blocks before `ordered`
+    // have not moved, the rest are found again
+    fn order(&mut self) {
+        let keep = match self.ordered {
+            0 => 0,
+            ordered => self.blocks[ordered - 1].order_end,
+        };
+        for &id in &self.order[keep..] {
+            self.placed[id as usize] = false;
+        }
+        self.order.truncate(keep);
+        self.placed.resize(self.analyzer.vocab().capacity(), false);
+        for block in &mut self.blocks[self.ordered..] {
+            for &id in &block.ids {
+                if !self.placed[id as usize] {
+                    self.placed[id as usize] = true;
+                    self.order.push(id);
+                }
+            }
+            block.order_end = self.order.len();
+        }
+        self.ordered = self.blocks.len();
+    }
+
+    pub fn stats(&mut self) -> WordStats {
+        self.order();
+        let mut stats = WordStats::new();
+        self.analyzer.fill_blocks(self.counts(), &self.order, &mut stats);
+        stats
+    }
+
+    // Counts, average word length and reading time only, in constant time;
+    // unique_words and the word lists are left empty
+    pub fn totals(&self) -> WordStats {
+        let mut stats = WordStats::new();
+        self.analyzer.fill_counts(&self.counts(), &mut stats);
+        stats
+    }
+}
+
+#[pymethods]
+impl IncrementalAnalyzer {
+    #[new]
+    #[pyo3(signature = (config=None))]
+    fn py_new(config: Option<AnalyzerConfig>) -> Self {
+        IncrementalAnalyzer::new(config.unwrap_or_default())
+    }
+
+    #[getter]
+    fn config(&self) -> AnalyzerConfig {
+        self.analyzer.config().clone()
+    }
+
+    #[pyo3(name = "set_text")]
+    fn py_set_text(&mut self, py: Python<'_>, text: &str) {
+        py.allow_threads(|| self.set_text(text))
+    }
+
+    // Replaces `removed` blocks starting at block `first` with the blocks
+    // `texts` (without their newlines)
+    #[pyo3(name = "splice")]
+    fn py_splice(&mut self, py: Python<'_>, first: usize, removed: usize, texts: Vec<String>) -> PyResult<()> {
+        if first.checked_add(removed).map_or(true, |end| end > self.len()) {
+            return Err(PyIndexError::new_err("block index out of range"));
+        }
+        py.allow_threads(|| self.splice(first, removed, texts));
+        Ok(())
+    }
+
+    #[pyo3(name = "stats")]
+    fn py_stats(&mut self, py: Python<'_>) -> WordStats {
+        py.allow_threads(|| self.stats())
+    }
+
+    #[pyo3(name = "totals")]
+    fn py_totals(&self) -> WordStats {
+        self.totals()
+    }
+
+    fn __len__(&self) -> usize {
+        self.len()
+    }
+
+    fn __repr__(&self) -> String {
+        format!("IncrementalAnalyzer(blocks={}, words={})", self.len(), self.totals.words)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const FRAGMENTS: &[&str] = &[
+        "the ", "The ", "quick ", "fox", ". ", "! ", "?", "...", "\n", "\n\n", "\r", "don't ",
+        "naïve-café ", "日本語 ", "  ", "\t", "x-", "-y ", "end.", "42 ", "ΟΔΟΣ ", "\u{a0}",
+    ];
+
+    fn piece(seed: &mut u64) -> &'static str {
+        *seed ^= *seed << 13;
+        *seed ^= *seed >> 7;
+        *seed ^= *seed << 17;
+        FRAGMENTS[(*seed % FRAGMENTS.len() as u64) as usize]
+    }
+
+    // Stats and the frequency table, in order
+    fn summary(stats: WordStats) -> String {
+        let words: Vec<(&str, u64)> =
+            (0..stats.density.len()).map(|i| (stats.density.word(i), stats.density.count(i))).collect();
+        format!("{} {:?}", stats.to_json(), words)
+    }
+
+    fn config() -> AnalyzerConfig {
+        AnalyzerConfig::default()
+    }
+
+    #[test]
+    fn edits_match_full_analysis() {
+        for mut seed in 1..40u64 {
+            let mut blocks: Vec<String> = vec![String::new()];
+            let mut incremental = IncrementalAnalyzer::new(config());
+            for _ in 0..150 {
+                // Replace up to three blocks with up to three new ones
+                let first = (seed % blocks.len() as u64) as usize;
+                let removed = ((seed >> 8) % 4).min((blocks.len() - first) as u64) as usize;
+                let mut texts = Vec::new();
+                for _ in 0..(seed >> 16) % 4 {
+                    let text: String = (0..(seed >> 20) % 6).map(|_| piece(&mut seed)).collect();
+                    texts.push(text.replace('\n', " "));
+                }
+                piece(&mut seed);
+                if blocks.len() - removed + texts.len() == 0 {
+                    continue;
+                }
+                blocks.splice(first..first + removed, texts.iter().cloned());
+                incremental.splice(first, removed, texts);
+
+                let expected = Analyzer::new(config()).analyze(&blocks.join("\n"), None).unwrap();
+                let totals = incremental.totals();
+                assert_eq!(
+                    (totals.words, totals.sentences, totals.paragraphs, totals.characters),
+                    (expected.words, expected.sentences, expected.paragraphs, expected.characters),
+                );
+                assert_eq!(summary(incremental.stats()), summary(expected), "seed {}", seed);
+            }
+        }
+    }
+
+    #[test]
+    fn typing_and_undoing_keeps_the_vocabulary_bounded() {
+        let mut incremental = IncrementalAnalyzer::new(config());
+        incremental.set_text("some text\nthat stays\nhere");
+        let mut seed = 7u64;
+        let mut peak = 0;
+        for _ in 0..20_000 {
+            // Type a new word letter by letter, then undo it
+            let mut line = String::from("that stays ");
+            for _ in 0..6 {
+                seed ^= seed << 13;
+                seed ^= seed >> 7;
+                seed ^= seed << 17;
+                line.push((b'a' + (seed % 26) as u8) as char);
+                incremental.splice(1, 1, [line.clone()]);
+            }
+            incremental.splice(1, 1, ["that stays".to_string()]);
+            peak = peak.max(incremental.analyzer.vocab().scratch_bytes());
+        }
+        // Without compaction: one interned word per keystroke, over 5 MB
+        assert!(peak < 1 << 20, "peak {} bytes", peak);
+        assert!(incremental.analyzer.vocab().capacity() <= 2 * 4096 + 8);
+        let expected = Analyzer::new(config()).analyze("some text\nthat stays\nhere", None).unwrap();
+        assert_eq!(summary(incremental.stats()), summary(expected));
+    }
+
+    #[test]
+    fn set_text_matches_full_analysis() {
+        let text = "One. Two\nthree\n\nfour? five\n";
+        let mut incremental = IncrementalAnalyzer::new(config());
+        incremental.set_text(text);
+        assert_eq!(incremental.len(), 5);
+        let expected = Analyzer::new(config()).analyze(text, None).unwrap();
+        assert_eq!(summary(incremental.stats()), summary(expected));
+    }
+}
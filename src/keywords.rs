@@ -0,0 +1,409 @@
+// Keyword and phrase counting with one Aho-Corasick automaton.
+//
+// Keywords and text go through the same folding: lowercase, diacritics
+// removed (NFD without combining marks), final sigma and curly apostrophes
+// normalized, whitespace runs collapsed to one space. Matches may overlap, so
+// "machine learning" and "learning" are both counted in "machine learning".
+//
+// Keywords can also be counted in a token table, without the text: a keyword
+// is then the words the table's tokenizer finds in it, and a phrase matches
+// consecutive words of one sentence. This differs from counting in the text
+// in two ways (pinned by token_counts_differ_on_hyphens_and_punctuation and
+// stated in the keyword input's tooltip): punctuation between the words of a
+// phrase is ignored, and a hyphenated word is a single word.
+
+use aho_corasick::automaton::Automaton;
+use aho_corasick::nfa::contiguous::NFA;
+use aho_corasick::{AhoCorasick, Anchored};
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use rustc_hash::FxHashMap;
+use unicode_normalization::char::{decompose_canonical, is_combining_mark};
+
+use crate::scanner::{Token, Tokenizer};
+use crate::tokens::TokenTable;
+
+fn push_folded(c: char, out: &mut String) {
+    match c {
+        'ς' => out.push('σ'),
+        '\u{2019}' => out.push('\''),
+        _ => out.extend(c.to_lowercase()),
+    }
+}
+
+pub fn fold(text: &str) -> String {
+    let mut out = String::with_capacity(text.len());
+    let mut in_space = false;
+    for c in text.chars() {
+        if c.is_whitespace() {
+            if !in_space {
+                out.push(' ');
+            }
+            in_space = true;
+            continue;
+        }
+        in_space = false;
+        if c.is_ascii() {
+            out.push(c.to_ascii_lowercase());
+        } else {
+            decompose_canonical(c, |part| {
+                if !is_combining_mark(part) {
+                    push_folded(part, &mut out);
+                }
+            });
+        }
+    }
+    out
+}
+
+#[derive(Debug)]
+pub struct Matcher {
+    automaton: Option<AhoCorasick>,
+    // Keyword index of every pattern and whether its edges need a word boundary
+    patterns: Vec<(usize, bool, bool)>,
+    keywords: Vec<String>,
+    whole_words: bool,
+}
+
+impl Matcher {
+    pub fn new<S: AsRef<str>>(keywords: &[S], whole_words: bool) -> Result<Self, aho_corasick::BuildError> {
+        let mut folded: Vec<String> = Vec::new();
+        let mut patterns = Vec::new();
+        for (index, keyword) in keywords.iter().enumerate() {
+            let keyword = fold(keyword.as_ref().trim());
+            let (first, last) = match (keyword.chars().next(), keyword.chars().next_back()) {
+                (Some(first), Some(last)) => (first, last),
+                _ => continue, // empty keywords never match
+            };
+            patterns.push((index, first.is_alphanumeric(), last.is_alphanumeric()));
+            folded.push(keyword);
+        }
+        let automaton = if folded.is_empty() { None } else { Some(AhoCorasick::new(&folded)?) };
+        let keywords = keywords.iter().map(|keyword| keyword.as_ref().to_string()).collect();
+        Ok(Matcher { automaton, patterns, keywords, whole_words })
+    }
+
+    // Occurrences of every keyword, in keyword order
+    pub fn count(&self, text: &str) -> Vec<u64> {
+        let mut counts = vec![0u64; self.keywords.len()];
+        let automaton = match &self.automaton {
+            Some(automaton) => automaton,
+            None => return counts,
+        };
+        let text = fold(text);
+        for found in automaton.find_overlapping_iter(&text) {
+            let (index, start_is_word, end_is_word) = self.patterns[found.pattern().as_usize()];
+            if self.whole_words {
+                let before = text[..found.start()].chars().next_back();
+                let after = text[found.end()..].chars().next();
+                if (start_is_word && before.map_or(false, char::is_alphanumeric))
+                    || (end_is_word && after.map_or(false, char::is_alphanumeric))
+                {
+                    continue;
+                }
+            }
+            counts[index] += 1;
+        }
+        counts
+    }
+
+    // Occurrences of every keyword among the words of `table`, in keyword order
+    pub fn count_tokens(&self, table: &TokenTable) -> Vec<u64> {
+        let words = TableForms::new(table);
+
+        // Keywords as folded words, split by the table's own tokenizer; each
+        // distinct word is a part
+        let tokenizer = Tokenizer::new(table.rules());
+        let mut parts: Vec<String> = Vec::new();
+        let mut part_ids: FxHashMap<String, u32> = FxHashMap::default();
+        let keywords: Vec<Vec<u32>> = self
+            .keywords
+            .iter()
+            .map(|keyword| {
+                let mut ids = Vec::new();
+                // Without a cancel token the scan always runs to completion
+                let _ = tokenizer.scan(
+                    keyword,
+                    &mut |token: Token| {
+                        let part = fold(token.text);
+                        ids.push(*part_ids.entry(part).or_insert_with_key(|part| {
+                            parts.push(part.clone());
+                            parts.len() as u32 - 1
+                        }));
+                    },
+                    None,
+                );
+                ids
+            })
+            .collect();
+
+        if self.whole_words {
+            words.count_whole(&parts, &keywords)
+        } else {
+            words.count_within(&parts, &keywords)
+        }
+    }
+}
+
+// A token table's words folded like keywords: every distinct folded form,
+// how often it occurs and the form of each token
+struct TableForms<'a> {
+    table: &'a TokenTable,
+    forms: Vec<String>,
+    form_ids: FxHashMap<String, u32>,
+    form_counts: Vec<u64>,
+    // Form of every frequency table row
+    row_forms: Vec<u32>,
+}
+
+// Relations of a form to a keyword part (bit flags)
+const PART_STARTS: u8 = 1;
+const PART_ENDS: u8 = 2;
+
+impl<'a> TableForms<'a> {
+    fn new(table: &'a TokenTable) -> Self {
+        let words = table.words();
+        let mut forms = TableForms {
+            table,
+            forms: Vec::new(),
+            form_ids: FxHashMap::default(),
+            form_counts: Vec::new(),
+            row_forms: Vec::with_capacity(words.len()),
+        };
+        for row in 0..words.len() {
+            let form = fold(words.word(row));
+            let id = match forms.form_ids.get(&form) {
+                Some(&id) => id,
+                None => {
+                    let id = forms.forms.len() as u32;
+                    forms.forms.push(form.clone());
+                    forms.form_ids.insert(form, id);
+                    forms.form_counts.push(0);
+                    id
+                }
+            };
+            forms.form_counts[id as usize] += words.count(row);
+            forms.row_forms.push(id);
+        }
+        forms
+    }
+
+    fn form_of(&self, token: usize) -> u32 {
+        self.row_forms[self.table.word_ids()[token] as usize]
+    }
+
+    // Whole words: a single word is one lookup; phrases are sequences of
+    // forms, found by one automaton walked along the tokens of each sentence
+    fn count_whole(&self, parts: &[String], keywords: &[Vec<u32>]) -> Vec<u64> {
+        let part_forms: Vec<Option<u32>> = parts.iter().map(|part| self.form_ids.get(part).copied()).collect();
+        let mut counts = vec![0u64; keywords.len()];
+        let mut patterns: Vec<Vec<u8>> = Vec::new();
+        let mut pattern_keywords = Vec::new();
+        for (index, keyword) in keywords.iter().enumerate() {
+            let forms: Option<Vec<u32>> = keyword.iter().map(|&part| part_forms[part as usize]).collect();
+            match forms.as_deref() {
+                // Empty, or a word the text does not have
+                None | Some([]) => {}
+                Some(&[form]) => counts[index] = self.form_counts[form as usize],
+                Some(forms) => {
+                    patterns.push(forms.iter().flat_map(|form| form.to_le_bytes()).collect());
+                    pattern_keywords.push(index);
+                }
+            }
+        }
+        if patterns.is_empty() {
+            return counts;
+        }
+
+        // Every form is four bytes, so a pattern ending at a token boundary
+        // also starts at one
+        let automaton = NFA::new(&patterns).expect("phrase automaton");
+        let start = automaton.start_state(Anchored::No).expect("unanchored start state");
+        let mut state = start;
+        let mut sentence = None;
+        for (token, &token_sentence) in self.table.sentences().iter().enumerate() {
+            if sentence != Some(token_sentence) {
+                state = start;
+                sentence = Some(token_sentence);
+            }
+            for byte in self.form_of(token).to_le_bytes() {
+                state = automaton.next_state(Anchored::No, state, byte);
+            }
+            if automaton.is_match(state) {
+                for at in 0..automaton.match_len(state) {
+                    counts[pattern_keywords[automaton.match_pattern(state, at).as_usize()]] += 1;
+                }
+            }
+        }
+        counts
+    }
+
+    // Substrings of words: one automaton over the parts, run once on every
+    // form. A single word counts every occurrence; in a phrase the first
+    // part must end a word, the middle ones be whole words and the last
+    // start a word.
+    fn count_within(&self, parts: &[String], keywords: &[Vec<u32>]) -> Vec<u64> {
+        let mut counts = vec![0u64; keywords.len()];
+        if parts.is_empty() {
+            return counts;
+        }
+        let automaton = AhoCorasick::new(parts).expect("part automaton");
+
+        // Occurrences of every part, and the relations of every form to the parts
+        let mut part_counts = vec![0u64; parts.len()];
+        let mut relations: Vec<Vec<(u32, u8)>> = vec![Vec::new(); self.forms.len()];
+        for (form_id, form) in self.forms.iter().enumerate() {
+            for found in automaton.find_overlapping_iter(form) {
+                let part = found.pattern().as_u32();
+                part_counts[part as usize] += self.form_counts[form_id];
+                let flags = ((found.start() == 0) as u8 * PART_STARTS) | ((found.end() == form.len()) as u8 * PART_ENDS);
+                if flags != 0 {
+                    relations[form_id].push((part, flags));
+                }
+            }
+        }
+        let related = |token: usize, part: u32, flags: u8| {
+            relations[self.form_of(token) as usize].iter().any(|&(p, f)| p == part && f & flags == flags)
+        };
+
+        // Phrases by their first part
+        let mut phrases: FxHashMap<u32, Vec<usize>> = FxHashMap::default();
+        for (index, keyword) in keywords.iter().enumerate() {
+            match keyword.as_slice() {
+                [] => {}
+                &[part] => counts[index] = part_counts[part as usize],
+                &[first, ..] => phrases.entry(first).or_default().push(index),
+            }
+        }
+        if phrases.is_empty() {
+            return counts;
+        }
+
+        let sentences = self.table.sentences();
+        for token in 0..sentences.len() {
+            for &(first, flags) in &relations[self.form_of(token) as usize] {
+                if flags & PART_ENDS == 0 {
+                    continue;
+                }
+                for &index in phrases.get(&first).map_or(&[][..], Vec::as_slice) {
+                    let keyword = &keywords[index];
+                    let last = keyword.len() - 1;
+                    let matched = token + last < sentences.len()
+                        && sentences[token + last] == sentences[token]
+                        && (1..=last).all(|at| {
+                            let wanted = if at == last { PART_STARTS } else { PART_STARTS | PART_ENDS };
+                            related(token + at, keyword[at], wanted)
+                        });
+                    counts[index] += matched as u64;
+                }
+            }
+        }
+        counts
+    }
+}
+
+#[pyclass(module = "wdlib")]
+pub struct KeywordMatcher {
+    matcher: Matcher,
+}
+
+#[pymethods]
+impl KeywordMatcher {
+    #[new]
+    #[pyo3(signature = (keywords, whole_words=true))]
+    fn py_new(keywords: Vec<String>, whole_words: bool) -> PyResult<Self> {
+        let matcher = Matcher::new(&keywords, whole_words)
+            .map_err(|err| PyValueError::new_err(err.to_string()))?;
+        Ok(KeywordMatcher { matcher })
+    }
+
+    // Builds a matcher from a comma-separated keyword list
+    #[staticmethod]
+    #[pyo3(signature = (text, whole_words=true))]
+    fn from_csv(text: &str, whole_words: bool) -> PyResult<Self> {
+        let keywords = text.split(',').map(|keyword| keyword.trim().to_string()).collect();
+        KeywordMatcher::py_new(keywords, whole_words)
+    }
+
+    #[getter]
+    fn keywords(&self) -> Vec<String> {
+        self.matcher.keywords.clone()
+    }
+
+    #[getter]
+    fn whole_words(&self) -> bool {
+        self.matcher.whole_words
+    }
+
+    // Occurrences of every keyword in `text`, in keyword order
+    fn count(&self, py: Python<'_>, text: &str) -> Vec<u64> {
+        py.allow_threads(|| self.matcher.count(text))
+    }
+
+    // Occurrences of every keyword among the words of a token table, in
+    // keyword order, without scanning the text again
+    fn count_tokens(&self, py: Python<'_>, table: &TokenTable) -> Vec<u64> {
+        py.allow_threads(|| self.matcher.count_tokens(table))
+    }
+
+    fn __len__(&self) -> usize {
+        self.matcher.keywords.len()
+    }
+
+    fn __repr__(&self) -> String {
+        format!("KeywordMatcher(keywords={}, whole_words={})",
+            self.matcher.keywords.len(),
+            if self.matcher.whole_words { "True" } else { "False" })
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::analyzer::Analyzer;
+
+    #[test]
+    fn token_counts_match_text_counts() {
+        let text = "Machine learning is fun. MACHINE\nlearning, naïve learners; Δρόμος δρόμος! \
+                    Learning machine learning";
+        let keywords = ["machine learning", "learning", "Naive", "δρόμος", "", "learn", "machine learning fun"];
+        let table = TokenTable::build(&mut Analyzer::default(), text, None).unwrap();
+        for whole_words in [true, false] {
+            let matcher = Matcher::new(&keywords, whole_words).unwrap();
+            assert_eq!(matcher.count_tokens(&table), matcher.count(text), "whole_words={}", whole_words);
+        }
+    }
+
+    #[test]
+    fn token_counts_differ_on_hyphens_and_punctuation() {
+        // A hyphenated word is one token, and the comma is not part of any
+        // token; the text counts see both
+        let text = "machine-learning, machine, learning";
+        let keywords = ["learning", "machine learning"];
+        let table = TokenTable::build(&mut Analyzer::default(), text, None).unwrap();
+        let matcher = Matcher::new(&keywords, true).unwrap();
+        assert_eq!(matcher.count_tokens(&table), [1, 1]);
+        assert_eq!(matcher.count(text), [2, 0]);
+        let matcher = Matcher::new(&keywords, false).unwrap();
+        assert_eq!(matcher.count_tokens(&table), [2, 1]);
+        assert_eq!(matcher.count(text), [2, 0]);
+    }
+
+    #[test]
+    fn repeated_and_overlapping_phrases() {
+        let text = "a b c a b. c a b c";
+        let keywords = ["a b", "A  b", "b c", "a b c", "c a", "b"];
+        let table = TokenTable::build(&mut Analyzer::default(), text, None).unwrap();
+        for whole_words in [true, false] {
+            let matcher = Matcher::new(&keywords, whole_words).unwrap();
+            assert_eq!(matcher.count_tokens(&table), [3, 3, 2, 2, 2, 3], "whole_words={}", whole_words);
+        }
+    }
+
+    #[test]
+    fn phrases_stay_within_a_sentence() {
+        let table = TokenTable::build(&mut Analyzer::default(), "machine. Learning machine, learning", None).unwrap();
+        let matcher = Matcher::new(&["machine learning"], true).unwrap();
+        assert_eq!(matcher.count_tokens(&table), [1]);
+    }
+}
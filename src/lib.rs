@@ -1,22 +1,98 @@
+use pyo3::create_exception;
+use pyo3::exceptions::PyException;
 use pyo3::prelude::*;
+use pyo3::types::{PyDict, PyTuple};
 use serde::{Deserialize, Serialize};
-use std::collections::HashMap;
-use std::time::Instant;
+
+mod analyzer;
+mod array;
+mod batch;
+mod cancel;
+mod count;
+mod file;
+mod frequency;
+mod incremental;
+mod keywords;
+mod matrix;
+mod parallel;
+mod profile;
+mod readability;
+mod scanner;
+mod stream;
+mod tokens;
+mod vocab;
+
+pub use analyzer::{Analyzer, AnalyzerConfig};
+pub use array::NumericArray;
+pub use batch::analyze_many;
+pub use cancel::CancelToken;
+pub use count::count_characters;
+pub use file::analyze_file;
+pub use frequency::{FrequencyTable, Vocabulary};
+pub use incremental::IncrementalAnalyzer;
+pub use keywords::KeywordMatcher;
+pub use matrix::frequency_matrix;
+pub use readability::readability;
+pub use readability::Readability;
+pub use stream::StreamingAnalyzer;
+pub use tokens::token_table;
+pub use tokens::TokenTable;
+
+// Rust functions behind the Python entry points, for benches/
+#[doc(hidden)]
+pub mod bench {
+    pub use crate::batch::analyze_batch;
+    pub use crate::count::count_chars;
+    pub use crate::file::analyze_bytes;
+    pub use crate::keywords::Matcher;
+    pub use crate::matrix::{word_bins, BinBy};
+    pub use crate::scanner::{Token, Tokenizer};
+    pub use crate::vocab::{lowercase_into, Vocab};
+}
+
+#[global_allocator]
+static ALLOCATOR: profile::CountingAllocator = profile::CountingAllocator;
+
+create_exception!(wdlib, Cancelled, PyException, "Analysis was cancelled through its CancelToken.");
+
+impl From<cancel::Cancelled> for PyErr {
+    fn from(_: cancel::Cancelled) -> PyErr {
+        Cancelled::new_err("analysis cancelled")
+    }
+}
 
 #[pyclass]
 #[derive(Serialize, Deserialize, Debug, Clone)]
 pub struct WordStats {
+    #[pyo3(get)]
     pub words: usize,
+    #[pyo3(get)]
     pub characters: usize,
+    #[pyo3(get)]
     pub characters_no_spaces: usize,
+    #[pyo3(get)]
     pub sentences: usize,
+    #[pyo3(get)]
     pub paragraphs: usize,
+    #[pyo3(get)]
     pub unique_words: usize,
+    #[pyo3(get)]
     pub avg_word_length: f64,
+    #[pyo3(get)]
     pub reading_time_seconds: usize,
-    pub density: HashMap<String, f64>,
+    // Full frequency table; left out of to_json()/to_dict() to keep exports small
+    #[pyo3(get)]
+    #[serde(skip)]
+    pub density: FrequencyTable,
     pub top_words: Vec<(String, usize)>,
     pub longest_words: Vec<String>,
+    // Invalid UTF-8 sequences replaced while decoding a file
+    #[pyo3(get)]
+    #[serde(default)]
+    pub invalid_utf8_sequences: usize,
+    // Stage timings, only with AnalyzerConfig(timings=True)
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub timings: Option<profile::Timings>,
 }
 
 #[pymethods]
@@ -32,93 +108,104 @@ impl WordStats {
             unique_words: 0,
             avg_word_length: 0.0,
             reading_time_seconds: 0,
-            density: HashMap::new(),
+            density: FrequencyTable::default(),
             top_words: Vec::new(),
             longest_words: Vec::new(),
+            invalid_utf8_sequences: 0,
+            timings: None,
+        }
+    }
+
+    #[getter]
+    fn top_words<'py>(&self, py: Python<'py>) -> &'py PyTuple {
+        PyTuple::new(py, self.top_words.iter().map(|(word, count)| (word, *count).to_object(py)))
+    }
+
+    #[getter]
+    fn longest_words<'py>(&self, py: Python<'py>) -> &'py PyTuple {
+        PyTuple::new(py, &self.longest_words)
+    }
+
+    #[getter]
+    fn timings<'py>(&self, py: Python<'py>) -> PyResult<Option<&'py PyDict>> {
+        let timings = match &self.timings {
+            Some(timings) => timings,
+            None => return Ok(None),
+        };
+        let dict = PyDict::new(py);
+        for (name, value) in profile::Timings::FIELDS.iter().zip(timings.values()) {
+            dict.set_item(name, value)?;
         }
+        Ok(Some(dict))
+    }
+
+    // Word -> count mapping over `density`
+    #[getter]
+    fn vocabulary(&self) -> Vocabulary {
+        Vocabulary::new(self.density.clone())
     }
 
     pub fn to_json(&self) -> String {
         serde_json::to_string_pretty(self).unwrap_or_else(|_| "{}".to_string())
     }
+
+    pub fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let dict = PyDict::new(py);
+        dict.set_item("words", self.words)?;
+        dict.set_item("characters", self.characters)?;
+        dict.set_item("characters_no_spaces", self.characters_no_spaces)?;
+        dict.set_item("sentences", self.sentences)?;
+        dict.set_item("paragraphs", self.paragraphs)?;
+        dict.set_item("unique_words", self.unique_words)?;
+        dict.set_item("avg_word_length", self.avg_word_length)?;
+        dict.set_item("reading_time_seconds", self.reading_time_seconds)?;
+        dict.set_item("top_words", self.top_words(py))?;
+        dict.set_item("longest_words", self.longest_words(py))?;
+        dict.set_item("invalid_utf8_sequences", self.invalid_utf8_sequences)?;
+        if let Some(timings) = self.timings(py)? {
+            dict.set_item("timings", timings)?;
+        }
+        Ok(dict)
+    }
 }
 
 impl WordStats {
     pub fn analyze(&mut self, text: &str) {
-        // Character counts
-        self.characters = text.chars().count();
-        self.characters_no_spaces = text.chars()
-            .filter(|c| !c.is_whitespace())
-            .count();
-        
-        // Split into paragraphs
-        let paragraphs: Vec<&str> = text
-            .split("\n\n")
-            .filter(|p| !p.trim().is_empty())
-            .collect();
-        self.paragraphs = paragraphs.len();
-        
-        // Sentence detection
-        let sentence_re = regex::Regex::new(r"[.!?]+[\s\n]+").unwrap();
-        let sentences: Vec<&str> = sentence_re
-            .split(text)
-            .filter(|s| !s.trim().is_empty())
-            .collect();
-        self.sentences = sentences.len();
-        
-        // Word detection
-        let word_re = regex::Regex::new(r"\b[\p{L}\p{M}']+(?:-[\p{L}\p{M}']+)*\b").unwrap();
-        let words: Vec<String> = word_re.find_iter(text)
-            .map(|m| m.as_str().to_lowercase())
-            .collect();
-        
-        self.words = words.len();
-        
-        // Calculate average word length
-        let total_letters: usize = words.iter()
-            .map(|w| w.chars().filter(|c| c.is_alphabetic()).count())
-            .sum();
-        self.avg_word_length = if self.words > 0 {
-            total_letters as f64 / self.words as f64
-        } else { 0.0 };
-        
-        // Unique words
-        let mut word_counts = HashMap::new();
-        for word in &words {
-            *word_counts.entry(word.clone()).or_insert(0) += 1;
-        }
-        self.unique_words = word_counts.len();
-        
-        // Top 5 most frequent words
-        let mut word_vec: Vec<(String, usize)> = word_counts.into_iter().collect();
-        word_vec.sort_by(|a, b| b.1.cmp(&a.1));
-        self.top_words = word_vec.iter()
-            .take(5)
-            .map(|(word, count)| (word.clone(), *count))
-            .collect();
-        
-        // Longest words
-        let mut unique_words_set: Vec<String> = words.into_iter().collect();
-        unique_words_set.sort();
-        unique_words_set.dedup();
-        unique_words_set.sort_by_key(|w| std::cmp::Reverse(w.len()));
-        self.longest_words = unique_words_set.into_iter().take(5).collect();
-        
-        // Reading time (225 WPM)
-        self.reading_time_seconds = (self.words as f64 / 225.0 * 60.0) as usize;
+        // Without a cancel token the analysis always runs to completion
+        let _ = Analyzer::default().analyze_into(text, self, None);
     }
 }
 
 #[pyfunction]
-pub fn analyze_text_fast(text: &str) -> WordStats {
-    let mut stats = WordStats::new();
-    stats.analyze(text);
-    stats
+#[pyo3(signature = (text, cancel=None))]
+pub fn analyze_text_fast(py: Python<'_>, text: &str, cancel: Option<CancelToken>) -> PyResult<WordStats> {
+    Ok(py.allow_threads(|| Analyzer::default().analyze(text, cancel.as_ref()))?)
 }
 
 #[pymodule]
-fn wdlib(_py: Python, m: &PyModule) -> PyResult<()> {
+fn wdlib(py: Python, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(analyze_text_fast, m)?)?;
+    m.add_function(wrap_pyfunction!(analyze_many, m)?)?;
+    m.add_function(wrap_pyfunction!(analyze_file, m)?)?;
+    m.add_function(wrap_pyfunction!(count_characters, m)?)?;
+    m.add_function(wrap_pyfunction!(token_table, m)?)?;
+    m.add_function(wrap_pyfunction!(frequency_matrix, m)?)?;
+    m.add_function(wrap_pyfunction!(readability, m)?)?;
     m.add_class::<WordStats>()?;
+    m.add_class::<Analyzer>()?;
+    m.add_class::<AnalyzerConfig>()?;
+    m.add_class::<StreamingAnalyzer>()?;
+    m.add_class::<IncrementalAnalyzer>()?;
+    m.add_class::<FrequencyTable>()?;
+    m.add_class::<Vocabulary>()?;
+    m.add_class::<NumericArray>()?;
+    m.add_class::<TokenTable>()?;
+    m.add_class::<KeywordMatcher>()?;
+    m.add_class::<Readability>()?;
+    m.add_class::<CancelToken>()?;
+    m.add("Cancelled", py.get_type::<Cancelled>())?;
+    py.import("collections.abc")?
+        .getattr("Mapping")?
+        .call_method1("register", (py.get_type::<Vocabulary>(),))?;
     Ok(())
 }
\ No newline at end of file
@@ -0,0 +1,87 @@
+// Word frequency matrix for the heatmap: the most frequent words against
+// equal slices of the text, binned from a token table.
+//
+// Words are never cut at slice edges, a word belongs to the slice its first
+// character falls in.
+
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::array::NumericArray;
+use crate::cancel::CancelToken;
+use crate::tokens::TokenTable;
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum BinBy {
+    Words,
+    Characters,
+}
+
+impl BinBy {
+    // Checks the Python arguments of a matrix
+    pub fn parse(bin_by: &str, bins: usize) -> PyResult<Self> {
+        if bins == 0 {
+            return Err(PyValueError::new_err("bins must be at least 1"));
+        }
+        match bin_by {
+            "words" => Ok(BinBy::Words),
+            "characters" => Ok(BinBy::Characters),
+            _ => Err(PyValueError::new_err("bin_by must be 'words' or 'characters'")),
+        }
+    }
+}
+
+// Row-major `top_n x bins` counts and the words of the rows
+pub fn word_bins(table: &TokenTable, top_n: usize, bins: usize, bin_by: BinBy) -> (Vec<String>, Vec<u64>) {
+    // Matrix row of every frequency table row
+    let words = table.words();
+    let ranked = words.ranked(top_n);
+    let mut rows = vec![u32::MAX; words.len()];
+    for (row, &index) in ranked.iter().enumerate() {
+        rows[index] = row as u32;
+    }
+
+    let stats = table.stats();
+    let total = match bin_by {
+        BinBy::Words => stats.words,
+        BinBy::Characters => stats.characters,
+    }
+    .max(1) as u128;
+    let mut matrix = vec![0u64; ranked.len() * bins];
+    for (index, (&id, &start)) in table.word_ids().iter().zip(table.starts()).enumerate() {
+        let row = rows[id as usize];
+        if row != u32::MAX {
+            let position = match bin_by {
+                BinBy::Words => index as u64,
+                BinBy::Characters => start,
+            };
+            let bin = (position as u128 * bins as u128 / total) as usize;
+            matrix[row as usize * bins + bin.min(bins - 1)] += 1;
+        }
+    }
+
+    let names = ranked.iter().map(|&index| words.word(index).to_string()).collect();
+    (names, matrix)
+}
+
+#[pyfunction]
+#[pyo3(signature = (text, top_n=15, bins=20, bin_by="words", config=None, cancel=None))]
+pub fn frequency_matrix(
+    py: Python<'_>,
+    text: &str,
+    top_n: usize,
+    bins: usize,
+    bin_by: &str,
+    config: Option<AnalyzerConfig>,
+    cancel: Option<CancelToken>,
+) -> PyResult<(Vec<String>, NumericArray)> {
+    let bin_by = BinBy::parse(bin_by, bins)?;
+    let mut analyzer = Analyzer::new(config.unwrap_or_default());
+    let (words, matrix) = py.allow_threads(|| {
+        TokenTable::build(&mut analyzer, text, cancel.as_ref())
+            .map(|table| word_bins(&table, top_n, bins, bin_by))
+    })?;
+    let rows = words.len();
+    Ok((words, NumericArray::matrix(matrix, rows, bins)))
+}
@@ -0,0 +1,172 @@
+// Sharded analysis of large texts.
+//
+// The text is only cut right before a space or tab that follows a character
+// which is neither whitespace nor a sentence terminator. No word, sentence
+// break or paragraph break can straddle such a cut, and the scanner state on
+// either side of it differs only in "the current sentence/paragraph has
+// content". Joining shard counts therefore just removes the sentence and
+// paragraph that were counted on both sides of the cut. Vocabularies are
+// merged in shard order, which reproduces the sequential first-seen order,
+// so the final stats are identical to a single-threaded run.
+
+use std::thread;
+
+use crate::cancel::{CancelToken, Cancelled};
+use crate::profile::{self, Allocations, AllocationScope};
+use crate::scanner::{Counts, Token, Tokenizer};
+use crate::vocab::Vocab;
+
+fn is_safe_cut(text: &str, pos: usize) -> bool {
+    let bytes = text.as_bytes();
+    if pos == 0 || !matches!(bytes[pos], b' ' | b'\t') {
+        return false;
+    }
+    match text[..pos].chars().next_back() {
+        Some(c) => !c.is_whitespace() && !matches!(c, '.' | '!' | '?'),
+        None => false,
+    }
+}
+
+// Shard boundaries including 0 and text.len(); fewer than `shards` pieces
+// come back when a region has no safe cut.
+pub fn split_points(text: &str, shards: usize) -> Vec<usize> {
+    let len = text.len();
+    let mut bounds = vec![0];
+    for k in 1..shards {
+        let from = (len * k / shards).max(bounds[bounds.len() - 1] + 1);
+        let until = len * (k + 1) / shards;
+        if let Some(pos) = (from..until).find(|&pos| is_safe_cut(text, pos)) {
+            bounds.push(pos);
+        }
+    }
+    bounds.push(len);
+    bounds
+}
+
+// Counts of two adjacent shards separated by a safe cut
+pub fn join(left: Counts, right: Counts) -> Counts {
+    Counts {
+        characters: left.characters + right.characters,
+        characters_no_spaces: left.characters_no_spaces + right.characters_no_spaces,
+        paragraphs: left.paragraphs + right.paragraphs - right.leading_paragraph as usize,
+        sentences: left.sentences + right.sentences - right.leading_sentence as usize,
+        words: left.words + right.words,
+        letters: left.letters + right.letters,
+        char_nanos: left.char_nanos + right.char_nanos,
+        leading_paragraph: left.leading_paragraph,
+        leading_sentence: left.leading_sentence,
+    }
+}
+
+// Scans up to `shards` pieces of `text` on separate threads, using one
+// scratch vocabulary per shard, and merges the result into `merged`.
+pub fn scan_sharded(
+    tokenizer: &Tokenizer,
+    text: &str,
+    shards: usize,
+    scratch: &mut Vec<Vocab>,
+    merged: &mut Vocab,
+    cancel: Option<&CancelToken>,
+) -> Result<Counts, Cancelled> {
+    let bounds = split_points(text, shards);
+    let shards = bounds.len() - 1;
+    if scratch.len() < shards {
+        scratch.resize_with(shards, Vocab::new);
+    }
+
+    // Workers of a profiled run count their allocations for it
+    let counting = profile::counting();
+    let results: Vec<(Result<Counts, Cancelled>, Allocations)> = thread::scope(|scope| {
+        let workers: Vec<_> = bounds
+            .windows(2)
+            .zip(scratch.iter_mut())
+            .map(|(bound, vocab)| {
+                let shard = &text[bound[0]..bound[1]];
+                scope.spawn(move || {
+                    let allocations = counting.then(AllocationScope::start);
+                    vocab.reset();
+                    let result = tokenizer.scan(shard, &mut |token: Token| { vocab.add(token.text); }, cancel);
+                    (result, allocations.map(AllocationScope::finish).unwrap_or_default())
+                })
+            })
+            .collect();
+        workers
+            .into_iter()
+            .map(|worker| worker.join().expect("shard worker panicked"))
+            .collect()
+    });
+
+    let mut total: Option<Counts> = None;
+    for ((result, allocations), vocab) in results.into_iter().zip(scratch.iter()) {
+        profile::credit(allocations);
+        let counts = result?;
+        merged.merge(vocab);
+        total = Some(match total {
+            Some(left) => join(left, counts),
+            None => counts,
+        });
+    }
+    Ok(total.unwrap_or_default())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::analyzer::{Analyzer, AnalyzerConfig};
+
+    const FRAGMENTS: &[&str] = &[
+        "the ", "The ", "quick ", "fox", ". ", "! ", "?", "...", "\n", "\n\n", "\r\n\r\n",
+        "don't ", "'quoted' ", "naïve-café ", "Über ", "日本語 ", "  ", "\t", "x-", "-y ",
+        "end.", "42 ", "ΟΔΟΣ ", "\u{a0}", "a--b ",
+    ];
+
+    fn corpus(mut seed: u64, pieces: usize) -> String {
+        let mut text = String::new();
+        for _ in 0..pieces {
+            seed ^= seed << 13;
+            seed ^= seed >> 7;
+            seed ^= seed << 17;
+            text.push_str(FRAGMENTS[(seed % FRAGMENTS.len() as u64) as usize]);
+        }
+        text
+    }
+
+    fn analyze(text: &str, threads: usize) -> String {
+        let config = AnalyzerConfig {
+            threads: Some(threads),
+            parallel_threshold: 0,
+            top_k: 10,
+            longest_k: 10,
+            ..AnalyzerConfig::default()
+        };
+        Analyzer::new(config).analyze(text, None).unwrap().to_json()
+    }
+
+    #[test]
+    fn sharded_matches_sequential() {
+        for seed in 1..60 {
+            let text = corpus(seed, 2000);
+            let expected = analyze(&text, 1);
+            for threads in [2, 3, 4, 7, 16] {
+                assert_eq!(analyze(&text, threads), expected, "seed {} threads {}", seed, threads);
+            }
+        }
+    }
+
+    #[test]
+    fn cuts_are_safe_and_ordered() {
+        let text = corpus(7, 5000);
+        let bounds = split_points(&text, 8);
+        assert_eq!(bounds.first(), Some(&0));
+        assert_eq!(bounds.last(), Some(&text.len()));
+        assert!(bounds.windows(2).all(|w| w[0] < w[1]));
+        assert!(bounds[1..bounds.len() - 1].iter().all(|&pos| is_safe_cut(&text, pos)));
+    }
+
+    #[test]
+    fn text_without_cuts_stays_whole() {
+        let text = "word.".repeat(1000);
+        assert_eq!(split_points(&text, 4), vec![0, text.len()]);
+        assert_eq!(analyze(&text, 4), analyze(&text, 1));
+    }
+}
@@ -0,0 +1,209 @@
+// Opt-in profiling of an analysis (AnalyzerConfig.timings).
+//
+// The scanner fuses paragraph splitting, sentence detection, tokenization
+// and word counting into one loop, so those stages are reported together as
+// `scan`. Allocation counts come from the global allocator, which counts into
+// thread-local counters only on threads with an active `AllocationScope`:
+// the thread running a profiled analysis and its shard workers. Elsewhere an
+// allocation costs one thread-local flag check.
+
+use serde::{Deserialize, Serialize};
+use std::alloc::{GlobalAlloc, Layout, System};
+use std::cell::Cell;
+use std::time::Instant;
+
+struct Counter {
+    active: Cell<bool>,
+    allocations: Cell<u64>,
+    allocated_bytes: Cell<u64>,
+}
+
+thread_local! {
+    // Const-initialized and without a destructor, so usable from the allocator
+    static COUNTER: Counter = const {
+        Counter { active: Cell::new(false), allocations: Cell::new(0), allocated_bytes: Cell::new(0) }
+    };
+}
+
+fn record(bytes: usize) {
+    // try_with: the allocator also runs while a thread is being torn down
+    let _ = COUNTER.try_with(|counter| {
+        if counter.active.get() {
+            counter.allocations.set(counter.allocations.get() + 1);
+            counter.allocated_bytes.set(counter.allocated_bytes.get() + bytes as u64);
+        }
+    });
+}
+
+pub struct CountingAllocator;
+
+// SAFETY: every call is forwarded to the system allocator unchanged
+unsafe impl GlobalAlloc for CountingAllocator {
+    unsafe fn alloc(&self, layout: Layout) -> *mut u8 {
+        record(layout.size());
+        System.alloc(layout)
+    }
+
+    unsafe fn alloc_zeroed(&self, layout: Layout) -> *mut u8 {
+        record(layout.size());
+        System.alloc_zeroed(layout)
+    }
+
+    unsafe fn realloc(&self, ptr: *mut u8, layout: Layout, new_size: usize) -> *mut u8 {
+        record(new_size.saturating_sub(layout.size()));
+        System.realloc(ptr, layout, new_size)
+    }
+
+    unsafe fn dealloc(&self, ptr: *mut u8, layout: Layout) {
+        System.dealloc(ptr, layout)
+    }
+}
+
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct Allocations {
+    pub count: u64,
+    pub bytes: u64,
+}
+
+fn current() -> Allocations {
+    COUNTER
+        .try_with(|counter| Allocations {
+            count: counter.allocations.get(),
+            bytes: counter.allocated_bytes.get(),
+        })
+        .unwrap_or_default()
+}
+
+// Whether allocations on this thread are being counted
+pub fn counting() -> bool {
+    COUNTER.try_with(|counter| counter.active.get()).unwrap_or(false)
+}
+
+// Adds allocations made on this thread's behalf elsewhere (shard workers)
+pub fn credit(allocations: Allocations) {
+    let _ = COUNTER.try_with(|counter| {
+        if counter.active.get() {
+            counter.allocations.set(counter.allocations.get() + allocations.count);
+            counter.allocated_bytes.set(counter.allocated_bytes.get() + allocations.bytes);
+        }
+    });
+}
+
+// Counts this thread's allocations from `start` until `finish` or drop
+pub struct AllocationScope {
+    was_active: bool,
+    start: Allocations,
+}
+
+impl AllocationScope {
+    pub fn start() -> Self {
+        let was_active = counting();
+        let _ = COUNTER.try_with(|counter| counter.active.set(true));
+        AllocationScope { was_active, start: current() }
+    }
+
+    pub fn finish(self) -> Allocations {
+        let now = current();
+        Allocations {
+            count: now.count - self.start.count,
+            bytes: now.bytes - self.start.bytes,
+        }
+    }
+}
+
+impl Drop for AllocationScope {
+    fn drop(&mut self) {
+        let was_active = self.was_active;
+        let _ = COUNTER.try_with(|counter| counter.active.set(was_active));
+    }
+}
+
+// Stage times in nanoseconds plus allocation figures of one analysis
+#[derive(Serialize, Deserialize, Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct Timings {
+    // CPU time of the character-count kernel, summed over shards
+    pub char_count_ns: u64,
+    // Paragraphs, sentences, tokenization and word counting (wall time,
+    // including char_count_ns and the shard merge)
+    pub scan_ns: u64,
+    pub top_k_ns: u64,
+    pub longest_k_ns: u64,
+    pub frequency_table_ns: u64,
+    pub total_ns: u64,
+    pub allocations: u64,
+    pub allocated_bytes: u64,
+    // Analyzer-owned buffers (vocabularies, ranking and carry buffers) after
+    // the run; they only grow during a run, so this is also their peak
+    pub peak_scratch_bytes: u64,
+}
+
+impl Timings {
+    pub const FIELDS: [&'static str; 9] = [
+        "char_count_ns",
+        "scan_ns",
+        "top_k_ns",
+        "longest_k_ns",
+        "frequency_table_ns",
+        "total_ns",
+        "allocations",
+        "allocated_bytes",
+        "peak_scratch_bytes",
+    ];
+
+    pub fn values(&self) -> [u64; 9] {
+        [
+            self.char_count_ns,
+            self.scan_ns,
+            self.top_k_ns,
+            self.longest_k_ns,
+            self.frequency_table_ns,
+            self.total_ns,
+            self.allocations,
+            self.allocated_bytes,
+            self.peak_scratch_bytes,
+        ]
+    }
+}
+
+// Measures one run: wall time and allocations since start
+pub struct Probe {
+    start: Instant,
+    allocations: AllocationScope,
+}
+
+impl Probe {
+    pub fn start() -> Self {
+        Probe {
+            start: Instant::now(),
+            allocations: AllocationScope::start(),
+        }
+    }
+
+    pub fn finish(self, timings: &mut Timings) {
+        timings.total_ns = elapsed_ns(self.start);
+        let allocations = self.allocations.finish();
+        timings.allocations = allocations.count;
+        timings.allocated_bytes = allocations.bytes;
+    }
+}
+
+pub fn elapsed_ns(since: Instant) -> u64 {
+    since.elapsed().as_nanos() as u64
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn counts_this_thread_inside_a_scope_only() {
+        let scope = AllocationScope::start();
+        let buffer: Vec<u8> = Vec::with_capacity(1000);
+        std::thread::spawn(|| Vec::<u8>::with_capacity(1 << 20)).join().unwrap();
+        let allocations = scope.finish();
+        drop(buffer);
+        assert!(allocations.count >= 1);
+        assert!(allocations.bytes >= 1000 && allocations.bytes < 1 << 20);
+        assert!(!counting());
+    }
+}
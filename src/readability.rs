@@ -0,0 +1,194 @@
+// Readability scores from one scan, or from a token table without one.
+//
+// Syllables come from an English heuristic (vowel groups, minus a silent
+// final "e"), as in most readability tools. Every score is derived from the
+// same counts:
+//
+// * polysyllables: words of three or more syllables (SMOG)
+// * complex words: polysyllables that are not hyphenated and do not reach
+//   three syllables only through an -es, -ed or -ing ending (Gunning Fog)
+
+use pyo3::prelude::*;
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::cancel::{CancelToken, Cancelled};
+use crate::tokens::TokenTable;
+
+fn is_vowel(c: char) -> bool {
+    matches!(c,
+        'a' | 'e' | 'i' | 'o' | 'u' | 'y'
+        | 'à' | 'á' | 'â' | 'ä' | 'æ' | 'è' | 'é' | 'ê' | 'ë' | 'ì' | 'í' | 'î' | 'ï'
+        | 'ò' | 'ó' | 'ô' | 'ö' | 'œ' | 'ù' | 'ú' | 'û' | 'ü' | 'ÿ')
+}
+
+fn lower(c: char) -> char {
+    if c.is_ascii() {
+        c.to_ascii_lowercase()
+    } else {
+        c.to_lowercase().next().unwrap_or(c)
+    }
+}
+
+fn ends_with(word: &str, suffix: &str) -> bool {
+    let bytes = word.as_bytes();
+    bytes.len() >= suffix.len() && bytes[bytes.len() - suffix.len()..].eq_ignore_ascii_case(suffix.as_bytes())
+}
+
+// Syllables of one word part (no hyphens), in any case
+fn part_syllables(word: &str) -> usize {
+    let mut groups = 0;
+    let mut in_vowels = false;
+    for c in word.chars() {
+        let vowel = is_vowel(lower(c));
+        if vowel && !in_vowels {
+            groups += 1;
+        }
+        in_vowels = vowel;
+    }
+    // Silent final "e", but not in "-ee" or in "-le" after a consonant ("table")
+    if groups > 1 && ends_with(word, "e") && !ends_with(word, "ee") {
+        let consonant_le = ends_with(word, "le")
+            && word.chars().rev().nth(2).map_or(false, |c| !is_vowel(lower(c)));
+        if !consonant_le {
+            groups -= 1;
+        }
+    }
+    groups.max(1)
+}
+
+pub fn syllables(word: &str) -> usize {
+    word.split('-').filter(|part| !part.is_empty()).map(part_syllables).sum::<usize>().max(1)
+}
+
+fn is_complex(word: &str, syllables: usize) -> bool {
+    if syllables < 3 || word.contains('-') {
+        return false;
+    }
+    let suffix = ["es", "ed", "ing"].iter().find(|suffix| ends_with(word, suffix));
+    match suffix {
+        Some(suffix) if word.len() > suffix.len() => part_syllables(&word[..word.len() - suffix.len()]) >= 3,
+        _ => true,
+    }
+}
+
+#[pyclass(module = "wdlib")]
+#[derive(Debug, Clone, Default)]
+pub struct Readability {
+    #[pyo3(get)]
+    pub words: usize,
+    #[pyo3(get)]
+    pub sentences: usize,
+    #[pyo3(get)]
+    pub syllables: usize,
+    #[pyo3(get)]
+    pub letters: usize,
+    #[pyo3(get)]
+    pub polysyllables: usize,
+    #[pyo3(get)]
+    pub complex_words: usize,
+    #[pyo3(get)]
+    pub flesch_reading_ease: f64,
+    #[pyo3(get)]
+    pub flesch_kincaid_grade: f64,
+    #[pyo3(get)]
+    pub gunning_fog: f64,
+    #[pyo3(get)]
+    pub coleman_liau_index: f64,
+    #[pyo3(get)]
+    pub smog_index: f64,
+    #[pyo3(get)]
+    pub automated_readability_index: f64,
+}
+
+impl Readability {
+    pub fn measure(analyzer: &Analyzer, text: &str, cancel: Option<&CancelToken>) -> Result<Self, Cancelled> {
+        let mut scores = Readability::default();
+        let counts = analyzer.scan_tokens(text, cancel, |token| {
+            let count = syllables(token.text);
+            scores.syllables += count;
+            scores.polysyllables += (count >= 3) as usize;
+            scores.complex_words += is_complex(token.text, count) as usize;
+        })?;
+        scores.words = counts.words;
+        scores.sentences = counts.sentences;
+        scores.letters = counts.letters;
+        scores.score();
+        Ok(scores)
+    }
+
+    // Same scores from the words of a table, each distinct word measured once
+    pub fn from_tokens(table: &TokenTable) -> Self {
+        let mut scores = Readability::default();
+        let words = table.words();
+        for index in 0..words.len() {
+            let (word, count) = (words.word(index), words.count(index) as usize);
+            let syllables = syllables(word);
+            scores.syllables += syllables * count;
+            scores.polysyllables += (syllables >= 3) as usize * count;
+            scores.complex_words += is_complex(word, syllables) as usize * count;
+        }
+        scores.words = table.stats().words;
+        scores.sentences = table.stats().sentences;
+        scores.letters = table.letters();
+        scores.score();
+        scores
+    }
+
+    fn score(&mut self) {
+        if self.words == 0 {
+            return;
+        }
+        let words = self.words as f64;
+        // Text without a sentence break is one sentence
+        let sentences = self.sentences.max(1) as f64;
+        let words_per_sentence = words / sentences;
+        let syllables_per_word = self.syllables as f64 / words;
+        let letters_per_word = self.letters as f64 / words;
+
+        self.flesch_reading_ease = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word;
+        self.flesch_kincaid_grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59;
+        self.gunning_fog = 0.4 * (words_per_sentence + 100.0 * self.complex_words as f64 / words);
+        self.coleman_liau_index =
+            0.0588 * letters_per_word * 100.0 - 0.296 * sentences / words * 100.0 - 15.8;
+        self.smog_index = 1.0430 * (self.polysyllables as f64 * 30.0 / sentences).sqrt() + 3.1291;
+        self.automated_readability_index =
+            4.71 * letters_per_word + 0.5 * words_per_sentence - 21.43;
+    }
+}
+
+#[pymethods]
+impl Readability {
+    fn __repr__(&self) -> String {
+        format!(
+            "Readability(flesch_reading_ease={:.1}, flesch_kincaid_grade={:.1}, words={}, sentences={})",
+            self.flesch_reading_ease, self.flesch_kincaid_grade, self.words, self.sentences
+        )
+    }
+}
+
+#[pyfunction]
+#[pyo3(signature = (text, config=None, cancel=None))]
+pub fn readability(
+    py: Python<'_>,
+    text: &str,
+    config: Option<AnalyzerConfig>,
+    cancel: Option<CancelToken>,
+) -> PyResult<Readability> {
+    let analyzer = Analyzer::new(config.unwrap_or_default());
+    Ok(py.allow_threads(|| Readability::measure(&analyzer, text, cancel.as_ref()))?)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn token_table_scores_match_a_scan() {
+        let text = "The quick brown fox jumps. Beautiful, complicated ideas are \
+                    interesting! Naïve ÉCOLE students re-examined everything... ok";
+        let mut analyzer = Analyzer::default();
+        let scanned = Readability::measure(&analyzer, text, None).unwrap();
+        let table = TokenTable::build(&mut analyzer, text, None).unwrap();
+        assert_eq!(format!("{:?}", Readability::from_tokens(&table)), format!("{:?}", scanned));
+    }
+}
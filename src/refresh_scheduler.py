@@ -0,0 +1,83 @@
+"""
+WD - Refresh scheduling
+Refreshes cheap metrics on every edit and expensive ones only once typing pauses
+"""
+
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from PyQt6.QtCore import QObject, QTimer
+
+# Refresh tiers, cheapest first
+TIER_COUNTS = 0    # word/character counters: next pass of the event loop
+TIER_WORDS = 1     # unique and top words: after the debounce
+TIER_DETAILS = 2   # readability, heatmap, keywords: when the user is idle
+
+
+class RefreshScheduler(QObject):
+    """Runs one refresh callback per tier, each a set delay after the last edit"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.timers: Dict[int, QTimer] = {}
+        self.delays: Dict[int, int] = {}
+
+    def add_tier(self, tier: int, callback: Callable[[], None], delay_ms: int):
+        """Register the refresh of one tier"""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(callback)
+        self.timers[tier] = timer
+        self.delays[tier] = delay_ms
+
+    def set_delay(self, tier: int, delay_ms: int):
+        """Change a tier's delay; takes effect from the next edit"""
+        self.delays[tier] = delay_ms
+
+    def delay(self, tier: int) -> int:
+        return self.delays[tier]
+
+    def edited(self):
+        """Schedule every tier; pending refreshes start their wait over"""
+        for tier, timer in self.timers.items():
+            timer.start(self.delays[tier])
+
+    def request(self, tier: int, delay_ms: Optional[int] = None):
+        """Schedule one tier alone, e.g. after a settings change"""
+        self.timers[tier].start(self.delays[tier] if delay_ms is None else delay_ms)
+
+    def stop(self):
+        """Drop all pending refreshes"""
+        for timer in self.timers.values():
+            timer.stop()
+
+
+class AdaptiveInterval:
+    """Picks a refresh delay from how long recent refreshes took
+
+    Keeps the last few (document size, seconds) samples and scales their
+    cost per character to the current document, so short texts refresh
+    almost at once and large ones wait long enough that work never queues up.
+    """
+
+    def __init__(self, initial_ms: int, floor_ms: int, ceiling_ms: int,
+                 headroom: float = 2.0, window: int = 20):
+        self.initial_ms = initial_ms
+        self.floor_ms = floor_ms
+        self.ceiling_ms = ceiling_ms
+        self.headroom = headroom
+        self.samples = deque(maxlen=window)
+
+    def record(self, size: int, seconds: float):
+        """Add the measured latency of one refresh of a document of `size` characters"""
+        self.samples.append((size, seconds))
+
+    def interval(self, size: int) -> int:
+        """Delay in ms for a document of `size` characters"""
+        if not self.samples:
+            delay = self.initial_ms
+        else:
+            chars = sum(sample_size for sample_size, _ in self.samples)
+            seconds = sum(sample_seconds for _, sample_seconds in self.samples)
+            delay = self.headroom * seconds * 1000 * size / max(chars, 1)
+        return int(min(max(delay, self.floor_ms), self.ceiling_ms))
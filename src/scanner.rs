@@ -0,0 +1,418 @@
+// Single-pass text scanner.
+//
+// Walks the UTF-8 bytes once and produces paragraph and sentence counts while
+// handing every word to a sink; character counts come from the vectorized
+// kernel in `count`. Rules:
+//
+// * paragraphs are separated by an empty line (`\n\n` or `\r\n\r\n`) and only
+//   count if they contain something other than whitespace
+// * sentences end at a run of `.`, `!` or `?` followed by whitespace
+// * words are runs of letters (and combining marks) with inner apostrophes,
+//   joined by single hyphens; leading/trailing apostrophes are dropped
+
+use crate::cancel::{CancelToken, Cancelled};
+use crate::count::count_chars;
+use std::time::Instant;
+
+// How often (in bytes) the scan loop looks at its cancel token
+const CANCEL_CHECK_INTERVAL: usize = 1 << 16;
+
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct Counts {
+    pub characters: usize,
+    pub characters_no_spaces: usize,
+    pub paragraphs: usize,
+    pub sentences: usize,
+    pub words: usize,
+    pub letters: usize,
+    // Time spent in the character-count kernel
+    pub char_nanos: u64,
+    // Whether the text before the first paragraph/sentence break had content
+    pub leading_paragraph: bool,
+    pub leading_sentence: bool,
+}
+
+pub struct Token<'a> {
+    pub text: &'a str,
+    pub letters: usize,
+    // Byte offset of the word in everything fed so far
+    pub start: usize,
+    // Sentences and paragraphs completed before this word
+    pub sentence: usize,
+    pub paragraph: usize,
+}
+
+pub trait TokenSink {
+    fn token(&mut self, token: Token<'_>);
+}
+
+impl<F: FnMut(Token<'_>)> TokenSink for F {
+    fn token(&mut self, token: Token<'_>) {
+        self(token)
+    }
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+enum Class {
+    Letter,
+    Apostrophe,
+    Hyphen,
+    Terminator,
+    Newline,
+    CarriageReturn,
+    Space,
+    Other,
+}
+
+// Tokenizer switches; the class table is built from these once.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct Rules {
+    pub apostrophes: bool,
+    pub hyphens: bool,
+}
+
+impl Default for Rules {
+    fn default() -> Self {
+        Rules { apostrophes: true, hyphens: true }
+    }
+}
+
+const fn ascii_classes() -> [Class; 128] {
+    let mut table = [Class::Other; 128];
+    let mut b = 0;
+    while b < 128 {
+        table[b] = match b as u8 {
+            b'a'..=b'z' | b'A'..=b'Z' => Class::Letter,
+            b'\'' => Class::Apostrophe,
+            b'-' => Class::Hyphen,
+            b'.' | b'!' | b'?' => Class::Terminator,
+            b'\n' => Class::Newline,
+            b'\r' => Class::CarriageReturn,
+            b'\t' | 0x0b | 0x0c | b' ' => Class::Space,
+            _ => Class::Other,
+        };
+        b += 1;
+    }
+    table
+}
+
+// Combining mark blocks; `char::is_alphabetic` already covers the marks that
+// carry the Alphabetic property (most Indic vowel signs etc.).
+fn is_combining_mark(c: char) -> bool {
+    matches!(c as u32,
+        0x0300..=0x036F | 0x0483..=0x0489 | 0x0591..=0x05BD | 0x064B..=0x065F
+        | 0x1AB0..=0x1AFF | 0x1DC0..=0x1DFF | 0x20D0..=0x20FF | 0xFE20..=0xFE2F)
+}
+
+fn classify(c: char) -> Class {
+    if c.is_whitespace() {
+        Class::Space
+    } else if c.is_alphabetic() || is_combining_mark(c) {
+        Class::Letter
+    } else {
+        Class::Other
+    }
+}
+
+#[derive(Debug, Clone, Copy)]
+pub struct Tokenizer {
+    classes: [Class; 128],
+}
+
+impl Default for Tokenizer {
+    fn default() -> Self {
+        Tokenizer::new(Rules::default())
+    }
+}
+
+impl Tokenizer {
+    pub fn new(rules: Rules) -> Self {
+        let mut classes = ascii_classes();
+        if !rules.apostrophes {
+            classes[b'\'' as usize] = Class::Other;
+        }
+        if !rules.hyphens {
+            classes[b'-' as usize] = Class::Other;
+        }
+        Tokenizer { classes }
+    }
+
+    pub fn scan<S: TokenSink>(
+        &self,
+        text: &str,
+        sink: &mut S,
+        cancel: Option<&CancelToken>,
+    ) -> Result<Counts, Cancelled> {
+        let mut state = ScanState::new();
+        state.feed(self, text, sink, cancel)?;
+        Ok(state.finish(sink))
+    }
+}
+
+// Scanner state between chunks; copied into locals for the hot loop
+#[derive(Debug, Default, Clone, Copy)]
+struct Cursor {
+    counts: Counts,
+
+    // Paragraph state
+    paragraph_has_content: bool,
+    paragraph_break_seen: bool,
+    after_newline: bool,
+
+    // Sentence state
+    sentence_has_content: bool,
+    sentence_break_seen: bool,
+    terminator_run: bool,
+
+    // Word state; offsets are relative to the current chunk
+    in_word: bool,
+    hyphen_pending: bool,
+    word_start: usize,
+    word_end: usize,
+    word_letters: usize,
+    // The current word has a letter in this chunk
+    word_end_in_chunk: bool,
+}
+
+// Scanner state where no word is open, enough to resume a scan there
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct Boundary {
+    paragraph_has_content: bool,
+    after_newline: bool,
+    sentence_has_content: bool,
+    terminator_run: bool,
+}
+
+impl Boundary {
+    // Paragraphs and sentences `finish` would add if the text ended here
+    pub fn closing(&self) -> (usize, usize) {
+        let sentence = self.sentence_has_content || self.terminator_run;
+        (self.paragraph_has_content as usize, sentence as usize)
+    }
+}
+
+// Resumable scan over a text delivered in chunks. A word cut by a chunk
+// boundary is carried over (copied) until it ends.
+#[derive(Debug, Default)]
+pub struct ScanState {
+    cursor: Cursor,
+    carry: String,
+    carry_end: usize,
+    // Absolute offsets of the current chunk and of the carried word
+    base: usize,
+    carry_start: usize,
+}
+
+impl ScanState {
+    pub fn new() -> Self {
+        ScanState::default()
+    }
+
+    fn emit<S: TokenSink>(&mut self, cursor: &mut Cursor, chunk: &str, sink: &mut S) {
+        cursor.counts.words += 1;
+        cursor.counts.letters += cursor.word_letters;
+        let letters = cursor.word_letters;
+        let (sentence, paragraph) = (cursor.counts.sentences, cursor.counts.paragraphs);
+        if self.carry.is_empty() {
+            let text = &chunk[cursor.word_start..cursor.word_end];
+            let start = self.base + cursor.word_start;
+            sink.token(Token { text, letters, start, sentence, paragraph });
+        } else {
+            if cursor.word_end_in_chunk {
+                self.carry.push_str(&chunk[..cursor.word_end]);
+                self.carry_end = self.carry.len();
+            }
+            let text = &self.carry[..self.carry_end];
+            let start = self.carry_start;
+            sink.token(Token { text, letters, start, sentence, paragraph });
+            self.carry.clear();
+        }
+        cursor.in_word = false;
+        cursor.hyphen_pending = false;
+    }
+
+    pub fn feed<S: TokenSink>(
+        &mut self,
+        tokenizer: &Tokenizer,
+        chunk: &str,
+        sink: &mut S,
+        cancel: Option<&CancelToken>,
+    ) -> Result<(), Cancelled> {
+        let bytes = chunk.as_bytes();
+        let mut c = self.cursor;
+        let started = Instant::now();
+        let chars = count_chars(chunk);
+        c.counts.char_nanos += started.elapsed().as_nanos() as u64;
+        c.counts.characters += chars.characters;
+        c.counts.characters_no_spaces += chars.characters_no_spaces();
+        c.word_start = 0;
+        c.word_end_in_chunk = false;
+
+        let mut next_check = 0;
+        let mut i = 0;
+        while i < bytes.len() {
+            if i >= next_check {
+                if let Err(cancelled) = CancelToken::check(cancel) {
+                    self.cursor = c;
+                    return Err(cancelled);
+                }
+                next_check = i + CANCEL_CHECK_INTERVAL;
+            }
+
+            let b = bytes[i];
+            let (class, len, alphabetic) = if b < 0x80 {
+                let class = tokenizer.classes[b as usize];
+                (class, 1, class == Class::Letter)
+            } else {
+                let ch = chunk[i..].chars().next().unwrap();
+                (classify(ch), ch.len_utf8(), ch.is_alphabetic())
+            };
+
+            if !matches!(class, Class::Newline | Class::CarriageReturn | Class::Space) {
+                c.paragraph_has_content = true;
+            }
+
+            // Paragraph breaks: a newline directly after another (CR is transparent)
+            match class {
+                Class::Newline => {
+                    if c.after_newline {
+                        if !c.paragraph_break_seen {
+                            c.counts.leading_paragraph = c.paragraph_has_content;
+                            c.paragraph_break_seen = true;
+                        }
+                        if c.paragraph_has_content {
+                            c.counts.paragraphs += 1;
+                            c.paragraph_has_content = false;
+                        }
+                    }
+                    c.after_newline = true;
+                }
+                Class::CarriageReturn => {}
+                _ => c.after_newline = false,
+            }
+
+            // Sentence breaks: terminator run followed by whitespace
+            match class {
+                Class::Terminator => c.terminator_run = true,
+                Class::Newline | Class::CarriageReturn | Class::Space => {
+                    if c.terminator_run {
+                        if !c.sentence_break_seen {
+                            c.counts.leading_sentence = c.sentence_has_content;
+                            c.sentence_break_seen = true;
+                        }
+                        if c.sentence_has_content {
+                            c.counts.sentences += 1;
+                        }
+                        c.sentence_has_content = false;
+                        c.terminator_run = false;
+                    }
+                }
+                _ => {
+                    c.sentence_has_content = true;
+                    c.terminator_run = false;
+                }
+            }
+
+            // Words
+            match class {
+                Class::Letter => {
+                    if !c.in_word {
+                        c.in_word = true;
+                        c.word_start = i;
+                        c.word_letters = 0;
+                    }
+                    c.hyphen_pending = false;
+                    c.word_end = i + len;
+                    c.word_end_in_chunk = true;
+                    if alphabetic {
+                        c.word_letters += 1;
+                    }
+                }
+                Class::Apostrophe if c.in_word => c.hyphen_pending = false,
+                Class::Hyphen if c.in_word && !c.hyphen_pending => c.hyphen_pending = true,
+                _ => {
+                    if c.in_word {
+                        self.emit(&mut c, chunk, sink);
+                    }
+                }
+            }
+
+            i += len;
+        }
+
+        // Carry the unfinished word into the next chunk
+        if c.in_word {
+            if self.carry.is_empty() {
+                self.carry_start = self.base + c.word_start;
+            }
+            if c.word_end_in_chunk {
+                self.carry_end = self.carry.len() + c.word_end - c.word_start;
+            }
+            self.carry.push_str(&chunk[c.word_start..]);
+        }
+        self.base += chunk.len();
+        self.cursor = c;
+        Ok(())
+    }
+
+    // A scan continuing from `boundary`, with counts starting at zero
+    pub fn resume(boundary: Boundary) -> Self {
+        let mut state = ScanState::new();
+        let c = &mut state.cursor;
+        c.paragraph_has_content = boundary.paragraph_has_content;
+        c.after_newline = boundary.after_newline;
+        c.sentence_has_content = boundary.sentence_has_content;
+        c.terminator_run = boundary.terminator_run;
+        state
+    }
+
+    // Ends the current word and returns the counts since the scan started
+    // and the boundary to resume from. Unlike `finish`, the open paragraph
+    // and sentence are not counted.
+    pub fn suspend<S: TokenSink>(&mut self, sink: &mut S) -> (Counts, Boundary) {
+        let mut c = self.cursor;
+        if c.in_word {
+            c.word_end_in_chunk = false;
+            self.emit(&mut c, "", sink);
+        }
+        let boundary = Boundary {
+            paragraph_has_content: c.paragraph_has_content,
+            after_newline: c.after_newline,
+            sentence_has_content: c.sentence_has_content,
+            terminator_run: c.terminator_run,
+        };
+        *self = ScanState::resume(boundary);
+        (c.counts, boundary)
+    }
+
+    // Flushes the last word and returns the totals; the state is ready for a
+    // new text afterwards.
+    pub fn finish<S: TokenSink>(&mut self, sink: &mut S) -> Counts {
+        let mut c = self.cursor;
+        if c.in_word {
+            c.word_end_in_chunk = false;
+            self.emit(&mut c, "", sink);
+        }
+
+        let mut counts = c.counts;
+        if c.paragraph_has_content {
+            counts.paragraphs += 1;
+        }
+        if !c.paragraph_break_seen {
+            counts.leading_paragraph = c.paragraph_has_content;
+        }
+        // A trailing terminator run with no whitespace after it is ordinary content
+        let sentence_has_content = c.sentence_has_content || c.terminator_run;
+        if sentence_has_content {
+            counts.sentences += 1;
+        }
+        if !c.sentence_break_seen {
+            counts.leading_sentence = sentence_has_content;
+        }
+
+        self.cursor = Cursor::default();
+        self.carry.clear();
+        self.base = 0;
+        counts
+    }
+}
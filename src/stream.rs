@@ -0,0 +1,220 @@
+// Streaming analysis for inputs that are never held in memory at once.
+//
+// Chunks may cut words, sentences and paragraphs anywhere; when bytes are fed
+// they may also cut UTF-8 sequences, which are completed by the next chunk.
+// Invalid UTF-8 is replaced with U+FFFD and counted the same way as
+// `String::from_utf8_lossy` would over the whole input.
+
+use pyo3::exceptions::PyTypeError;
+use pyo3::prelude::*;
+use pyo3::types::{PyBytes, PyString};
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::cancel::{CancelToken, Cancelled};
+use crate::scanner::ScanState;
+use crate::WordStats;
+
+const REPLACEMENT: &str = "\u{FFFD}";
+
+// Longest UTF-8 sequence
+const MAX_SEQUENCE: usize = 4;
+
+#[pyclass(module = "wdlib")]
+pub struct StreamingAnalyzer {
+    analyzer: Analyzer,
+    state: ScanState,
+    // Incomplete UTF-8 sequence at the end of the last bytes chunk
+    pending: Vec<u8>,
+    invalid: usize,
+}
+
+impl StreamingAnalyzer {
+    pub fn new(config: AnalyzerConfig) -> Self {
+        let mut analyzer = Analyzer::new(config);
+        analyzer.begin();
+        StreamingAnalyzer {
+            analyzer,
+            state: ScanState::new(),
+            pending: Vec::new(),
+            invalid: 0,
+        }
+    }
+
+    pub fn reset(&mut self) {
+        self.state = ScanState::new();
+        self.pending.clear();
+        self.invalid = 0;
+        self.analyzer.begin();
+    }
+
+    fn replace_invalid(&mut self, cancel: Option<&CancelToken>) -> Result<(), Cancelled> {
+        self.invalid += 1;
+        self.analyzer.feed(&mut self.state, REPLACEMENT, cancel)
+    }
+
+    fn flush_pending(&mut self, cancel: Option<&CancelToken>) -> Result<(), Cancelled> {
+        if self.pending.is_empty() {
+            return Ok(());
+        }
+        self.pending.clear();
+        self.replace_invalid(cancel)
+    }
+
+    pub fn feed_str(&mut self, chunk: &str, cancel: Option<&CancelToken>) -> Result<(), Cancelled> {
+        self.flush_pending(cancel)?;
+        self.analyzer.feed(&mut self.state, chunk, cancel)
+    }
+
+    // Feeds `data` decoded like `String::from_utf8_lossy`, until at least
+    // `until` bytes are used. Returns the bytes used; an incomplete sequence
+    // at the end is left over.
+    fn decode(&mut self, mut data: &[u8], until: usize, cancel: Option<&CancelToken>) -> Result<usize, Cancelled> {
+        let len = data.len();
+        while len - data.len() < until {
+            match std::str::from_utf8(data) {
+                Ok(text) => {
+                    self.analyzer.feed(&mut self.state, text, cancel)?;
+                    return Ok(len);
+                }
+                Err(err) => {
+                    let (valid, rest) = data.split_at(err.valid_up_to());
+                    // SAFETY: from_utf8 just validated this prefix
+                    let valid = unsafe { std::str::from_utf8_unchecked(valid) };
+                    self.analyzer.feed(&mut self.state, valid, cancel)?;
+                    match err.error_len() {
+                        Some(error_len) => {
+                            self.replace_invalid(cancel)?;
+                            data = &rest[error_len..];
+                        }
+                        None => return Ok(len - rest.len()),
+                    }
+                }
+            }
+        }
+        Ok(len - data.len())
+    }
+
+    pub fn feed_bytes(&mut self, mut data: &[u8], cancel: Option<&CancelToken>) -> Result<(), Cancelled> {
+        // A sequence split by the previous chunk is decoded together with the
+        // next few bytes; whatever it does not use is decoded with the rest
+        if !self.pending.is_empty() {
+            let split = self.pending.len();
+            let mut assembled = std::mem::take(&mut self.pending);
+            assembled.extend_from_slice(&data[..data.len().min(MAX_SEQUENCE - split)]);
+            let used = self.decode(&assembled, split, cancel)?;
+            if used < split {
+                // Still incomplete; the whole chunk went into `assembled`
+                assembled.drain(..used);
+                self.pending = assembled;
+                return Ok(());
+            }
+            data = &data[used - split..];
+            self.pending = assembled;
+            self.pending.clear();
+        }
+
+        let used = self.decode(data, data.len(), cancel)?;
+        self.pending.extend_from_slice(&data[used..]);
+        Ok(())
+    }
+
+    // Returns the stats of everything fed so far and starts a new stream
+    pub fn finish(&mut self) -> WordStats {
+        if !self.pending.is_empty() {
+            // Cannot be cancelled without a token
+            let _ = self.flush_pending(None);
+        }
+        let mut stats = WordStats::new();
+        self.analyzer.finish(&mut self.state, &mut stats);
+        stats.invalid_utf8_sequences = self.invalid;
+        self.reset();
+        stats
+    }
+}
+
+#[pymethods]
+impl StreamingAnalyzer {
+    #[new]
+    #[pyo3(signature = (config=None))]
+    fn py_new(config: Option<AnalyzerConfig>) -> Self {
+        StreamingAnalyzer::new(config.unwrap_or_default())
+    }
+
+    // A cancelled feed leaves a partial chunk behind, so the stream restarts
+    #[pyo3(name = "feed", signature = (chunk, cancel=None))]
+    fn py_feed(&mut self, py: Python<'_>, chunk: &PyAny, cancel: Option<CancelToken>) -> PyResult<()> {
+        let result = if let Ok(text) = chunk.downcast::<PyString>() {
+            let text = text.to_str()?;
+            py.allow_threads(|| self.feed_str(text, cancel.as_ref()))
+        } else if let Ok(bytes) = chunk.downcast::<PyBytes>() {
+            let data = bytes.as_bytes();
+            py.allow_threads(|| self.feed_bytes(data, cancel.as_ref()))
+        } else {
+            return Err(PyTypeError::new_err("feed() expects str or bytes"));
+        };
+        if result.is_err() {
+            self.reset();
+        }
+        Ok(result?)
+    }
+
+    #[pyo3(name = "finish")]
+    fn py_finish(&mut self, py: Python<'_>) -> WordStats {
+        py.allow_threads(|| self.finish())
+    }
+
+    #[pyo3(name = "reset")]
+    fn py_reset(&mut self) {
+        self.reset();
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const TEXT: &str = "Héllo wörld. Ünïcode naïve-café, 日本語 text!\n\nΟΔΟΣ 🎉 don't end.";
+
+    fn config() -> AnalyzerConfig {
+        AnalyzerConfig { threads: Some(1), ..AnalyzerConfig::default() }
+    }
+
+    // Stats of the lossy decoding of `bytes` in one piece
+    fn expected(bytes: &[u8]) -> WordStats {
+        let text = String::from_utf8_lossy(bytes);
+        let mut stats = Analyzer::new(config()).analyze(&text, None).unwrap();
+        stats.invalid_utf8_sequences = text.matches(REPLACEMENT).count();
+        stats
+    }
+
+    #[test]
+    fn str_chunks_match_whole_text() {
+        let whole = expected(TEXT.as_bytes()).to_json();
+        let mut stream = StreamingAnalyzer::new(config());
+        for (split, _) in TEXT.char_indices() {
+            stream.feed_str(&TEXT[..split], None).unwrap();
+            stream.feed_str(&TEXT[split..], None).unwrap();
+            assert_eq!(stream.finish().to_json(), whole, "split at {}", split);
+        }
+    }
+
+    #[test]
+    fn byte_chunks_match_whole_text() {
+        let mut inputs = vec![TEXT.as_bytes().to_vec()];
+        // Invalid and truncated sequences, overlong forms and surrogates
+        inputs.push(b"ab\xE0\x80\x80cd \xF0\x9F\x8E word\xC3 \xFF\xED\xA0\x80 x\xE2\x82 y\xF0\x90\x80".to_vec());
+        inputs.push(b"\xC0\xAF\xE0\xA0 \xF4\x90\x80\x80 \xC3\xA9t\xC3\xA9. \xE2\x80\x99s \xF0".to_vec());
+        let mut stream = StreamingAnalyzer::new(config());
+        for bytes in &inputs {
+            let whole = expected(bytes).to_json();
+            for first in 0..=bytes.len() {
+                for second in first..=bytes.len() {
+                    stream.feed_bytes(&bytes[..first], None).unwrap();
+                    stream.feed_bytes(&bytes[first..second], None).unwrap();
+                    stream.feed_bytes(&bytes[second..], None).unwrap();
+                    assert_eq!(stream.finish().to_json(), whole, "splits at {} and {}", first, second);
+                }
+            }
+        }
+    }
+}
@@ -0,0 +1,202 @@
+// Token table: one row per word of a text, stored as numeric columns that
+// Python reads through the buffer protocol.
+//
+// Offsets are character (code point) offsets, so `text[start:end]` in Python
+// is the word. Word ids index `words`, the frequency table of the same run.
+// The heatmap, readability scores and keyword counts can all be derived from
+// one table instead of scanning the text again.
+
+use pyo3::prelude::*;
+use std::sync::Arc;
+
+use crate::analyzer::{Analyzer, AnalyzerConfig};
+use crate::array::{Column, NumericArray};
+use crate::cancel::{CancelToken, Cancelled};
+use crate::count::count_chars;
+use crate::frequency::FrequencyTable;
+use crate::matrix::{self, BinBy};
+use crate::readability::Readability;
+use crate::scanner::Rules;
+use crate::WordStats;
+
+#[pyclass(module = "wdlib")]
+#[derive(Debug, Clone)]
+pub struct TokenTable {
+    word_ids: Arc<[u32]>,
+    starts: Arc<[u64]>,
+    ends: Arc<[u64]>,
+    sentences: Arc<[u32]>,
+    paragraphs: Arc<[u32]>,
+    stats: WordStats,
+    letters: usize,
+    // Tokenizer rules the table was built with
+    rules: Rules,
+}
+
+impl TokenTable {
+    pub fn build(analyzer: &mut Analyzer, text: &str, cancel: Option<&CancelToken>) -> Result<Self, Cancelled> {
+        let mut word_ids = Vec::new();
+        let mut starts = Vec::new();
+        let mut ends = Vec::new();
+        let mut sentences = Vec::new();
+        let mut paragraphs = Vec::new();
+
+        // Byte offsets become character offsets by counting the gaps between tokens
+        let mut byte_pos = 0;
+        let mut char_pos = 0u64;
+        let mut stats = WordStats::new();
+        let counts = analyzer.analyze_tokens(text, &mut stats, cancel, |token, id| {
+            char_pos += count_chars(&text[byte_pos..token.start]).characters as u64;
+            starts.push(char_pos);
+            char_pos += count_chars(token.text).characters as u64;
+            ends.push(char_pos);
+            byte_pos = token.start + token.text.len();
+            word_ids.push(id);
+            sentences.push(token.sentence as u32);
+            paragraphs.push(token.paragraph as u32);
+        })?;
+
+        // Vocabulary ids -> rows of the frequency table (first-seen order)
+        let vocab = analyzer.vocab();
+        let mut rows = vec![0u32; vocab.capacity()];
+        for (row, &id) in vocab.ids().iter().enumerate() {
+            rows[id as usize] = row as u32;
+        }
+        for id in &mut word_ids {
+            *id = rows[*id as usize];
+        }
+
+        Ok(TokenTable {
+            word_ids: word_ids.into(),
+            starts: starts.into(),
+            ends: ends.into(),
+            sentences: sentences.into(),
+            paragraphs: paragraphs.into(),
+            stats,
+            letters: counts.letters,
+            rules: analyzer.config().rules(),
+        })
+    }
+
+    pub fn len(&self) -> usize {
+        self.word_ids.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.word_ids.is_empty()
+    }
+
+    pub fn word_ids(&self) -> &[u32] {
+        &self.word_ids
+    }
+
+    pub fn starts(&self) -> &[u64] {
+        &self.starts
+    }
+
+    pub fn ends(&self) -> &[u64] {
+        &self.ends
+    }
+
+    pub fn sentences(&self) -> &[u32] {
+        &self.sentences
+    }
+
+    pub fn words(&self) -> &FrequencyTable {
+        &self.stats.density
+    }
+
+    pub fn stats(&self) -> &WordStats {
+        &self.stats
+    }
+
+    // Alphabetic characters in all words
+    pub fn letters(&self) -> usize {
+        self.letters
+    }
+
+    pub fn rules(&self) -> Rules {
+        self.rules
+    }
+}
+
+#[pymethods]
+impl TokenTable {
+    fn __len__(&self) -> usize {
+        self.len()
+    }
+
+    #[getter(word_ids)]
+    fn py_word_ids(&self) -> NumericArray {
+        NumericArray::new(Column::U32(self.word_ids.clone()))
+    }
+
+    #[getter(starts)]
+    fn py_starts(&self) -> NumericArray {
+        NumericArray::new(Column::U64(self.starts.clone()))
+    }
+
+    #[getter(ends)]
+    fn py_ends(&self) -> NumericArray {
+        NumericArray::new(Column::U64(self.ends.clone()))
+    }
+
+    #[getter(sentences)]
+    fn py_sentences(&self) -> NumericArray {
+        NumericArray::new(Column::U32(self.sentences.clone()))
+    }
+
+    #[getter]
+    fn paragraphs(&self) -> NumericArray {
+        NumericArray::new(Column::U32(self.paragraphs.clone()))
+    }
+
+    // Words and counts that `word_ids` refer to
+    #[getter(words)]
+    fn py_words(&self) -> FrequencyTable {
+        self.words().clone()
+    }
+
+    // Stats of the same run
+    #[getter(stats)]
+    fn py_stats(&self) -> WordStats {
+        self.stats.clone()
+    }
+
+    // Heatmap matrix of the `top_n` most frequent words, as frequency_matrix()
+    #[pyo3(signature = (top_n=15, bins=20, bin_by="words"))]
+    fn frequency_matrix(
+        &self,
+        py: Python<'_>,
+        top_n: usize,
+        bins: usize,
+        bin_by: &str,
+    ) -> PyResult<(Vec<String>, NumericArray)> {
+        let bin_by = BinBy::parse(bin_by, bins)?;
+        let (words, matrix) = py.allow_threads(|| matrix::word_bins(self, top_n, bins, bin_by));
+        let rows = words.len();
+        Ok((words, NumericArray::matrix(matrix, rows, bins)))
+    }
+
+    // Readability scores of the same text, as readability()
+    #[pyo3(name = "readability")]
+    fn py_readability(&self, py: Python<'_>) -> Readability {
+        py.allow_threads(|| Readability::from_tokens(self))
+    }
+
+    fn __repr__(&self) -> String {
+        format!("TokenTable(tokens={}, words={})", self.len(), self.words().len())
+    }
+}
+
+#[pyfunction]
+#[pyo3(signature = (text, config=None, cancel=None))]
+pub fn token_table(
+    py: Python<'_>,
+    text: &str,
+    config: Option<AnalyzerConfig>,
+    cancel: Option<CancelToken>,
+) -> PyResult<TokenTable> {
+    let mut analyzer = Analyzer::new(config.unwrap_or_default());
+    Ok(py.allow_threads(|| TokenTable::build(&mut analyzer, text, cancel.as_ref()))?)
+}
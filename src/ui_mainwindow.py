@@ -4,7 +4,6 @@ Black terminal aesthetic design
 """
 
 import sys
-import json
 import time
 import warnings
 from datetime import datetime
@@ -15,9 +14,7 @@ from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
 # ADD THESE IMPORTS
-import re
 import numpy as np
-from collections import Counter
 import matplotlib
 matplotlib.use('QtAgg')
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
@@ -26,6 +23,9 @@ import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 import seaborn as sns
 import textstat  # pip install textstat
+from src.analysis_worker import AnalysisTask
+from src.document import DocumentSnapshot
+from src.refresh_scheduler import AdaptiveInterval, RefreshScheduler, TIER_COUNTS, TIER_WORDS, TIER_DETAILS
 from src.export_manager import ExportManager
 from src.theme_manager import ThemeManager
 
@@ -40,11 +40,28 @@ except ImportError:
 class WDMainWindow(QMainWindow):
     """Main application window with black aesthetic"""
     
-    def __init__(self):
+    def __init__(self, debug=False):
         super().__init__()
+        self.debug = debug
         self.stats_history = []
         self.last_update_time = 0
         self.update_interval = 500  # ms
+        self.idle_interval = 1500  # ms
+        # Bounds of the refresh delays, which otherwise follow measured analysis time
+        self.update_interval_range = (30, 2000)  # ms
+        self.idle_interval_range = (300, 5000)  # ms
+        self.words_interval = AdaptiveInterval(self.update_interval, *self.update_interval_range)
+        self.details_interval = AdaptiveInterval(self.idle_interval, *self.idle_interval_range)
+        self.keyword_matcher = None
+        # Counts kept up to date edit by edit (see on_contents_change)
+        self.incremental = wdlib.IncrementalAnalyzer() if HAS_RUST else None
+        # Background analysis: one task at a time
+        self.analysis_pool = QThreadPool(self)
+        self.analysis_pool.setMaxThreadCount(1)
+        self.analysis_revision = 0
+        self.analysis_cancel = None
+        self.last_stats = None
+        self.document_snapshot = None
         self.theme_manager = ThemeManager()
         self.current_theme = "terminal_black"
         self.init_ui()
@@ -185,11 +202,14 @@ class WDMainWindow(QMainWindow):
         
         # Connect signals
         self.text_input.textChanged.connect(self.on_text_changed)
+        self.text_input.document().contentsChange.connect(self.on_contents_change)
         
-        # Timer for debounced updates
-        self.update_timer = QTimer()
-        self.update_timer.setSingleShot(True)
-        self.update_timer.timeout.connect(self.update_stats)
+        # Counters refresh on the next pass of the event loop, word lists after
+        # the debounce and the slower details only once typing pauses
+        self.refresh_scheduler = RefreshScheduler(self)
+        self.refresh_scheduler.add_tier(TIER_COUNTS, self.refresh_counts, 0)
+        self.refresh_scheduler.add_tier(TIER_WORDS, self.refresh_words, self.update_interval)
+        self.refresh_scheduler.add_tier(TIER_DETAILS, self.refresh_details, self.idle_interval)
         
         # Status bar
         self.status_bar = QStatusBar()
@@ -200,6 +220,12 @@ class WDMainWindow(QMainWindow):
         self.backend_label = QLabel(backend_text)
         self.status_bar.addPermanentWidget(self.backend_label)
         
+        # Current refresh delays, in debug mode
+        self.interval_label = QLabel()
+        self.interval_label.setVisible(self.debug)
+        self.status_bar.addPermanentWidget(self.interval_label)
+        self.show_intervals()
+        
         # Set focus to input
         self.text_input.setFocus()
         
@@ -387,27 +413,176 @@ class WDMainWindow(QMainWindow):
         self.setFont(font)
         
     def on_text_changed(self):
-        """Handle text changes with debouncing"""
-        self.update_timer.stop()
-        self.update_timer.start(self.update_interval)
+        """Handle text changes: drop pending work and schedule the refresh tiers"""
+        self.cancel_analysis()
+        self.adapt_intervals()
+        self.refresh_scheduler.edited()
+        
+    def adapt_intervals(self):
+        """Fit the refresh delays to the document size and recent analysis times"""
+        size = self.text_input.document().characterCount()
+        words_delay = self.words_interval.interval(size)
+        details_delay = max(self.details_interval.interval(size), words_delay)
+        self.refresh_scheduler.set_delay(TIER_WORDS, words_delay)
+        self.refresh_scheduler.set_delay(TIER_DETAILS, details_delay)
+        self.show_intervals()
+        
+    def show_intervals(self):
+        """Show the refresh delays in the status bar (debug mode only)"""
+        if self.debug:
+            self.interval_label.setText(
+                f"debounce {self.refresh_scheduler.delay(TIER_WORDS)} ms · "
+                f"idle {self.refresh_scheduler.delay(TIER_DETAILS)} ms"
+            )
+        
+    def on_contents_change(self, position, removed, added):
+        """Pass an edit to the incremental analyzer as the blocks it touched"""
+        if self.incremental is None:
+            return
+        
+        document = self.text_input.document()
+        first = document.findBlock(position)
+        last = document.findBlock(min(position + added, document.characterCount() - 1))
+        count = last.blockNumber() - first.blockNumber() + 1
+        # Blocks outside the edit are unchanged, so the rest were replaced
+        removed_blocks = count - (document.blockCount() - len(self.incremental))
+        
+        texts = []
+        block = first
+        for _ in range(count):
+            texts.append(block.text().replace("\u2028", "\n"))
+            block = block.next()
         
+        try:
+            self.incremental.splice(first.blockNumber(), removed_blocks, texts)
+        except (IndexError, OverflowError):
+            # Out of step with the document; start over from its full text
+            self.incremental.set_text(self.text_input.toPlainText())
+            
     def update_stats(self):
-        """Update statistics based on current text"""
-        text = self.text_input.toPlainText()
+        """Refresh every tier now (after clearing or pasting)"""
+        # The edit itself already scheduled every tier; run them once, now
+        self.refresh_scheduler.stop()
+        self.refresh_counts()
+        self.refresh_words()
+        self.refresh_details()
+        
+    def cancel_analysis(self):
+        """Start a new revision; work still pending for older ones is dropped"""
+        self.analysis_revision += 1
+        if self.analysis_cancel is not None:
+            self.analysis_cancel.cancel()
+        self.analysis_cancel = wdlib.CancelToken() if HAS_RUST else None
+        self.analysis_pool.clear()
+        
+    def snapshot(self):
+        """The text of the current revision, copied out of the editor once"""
+        if self.document_snapshot is None or self.document_snapshot.revision != self.analysis_revision:
+            self.document_snapshot = DocumentSnapshot(self.text_input.toPlainText(), self.analysis_revision)
+        return self.document_snapshot
+        
+    def start_analysis(self, job, *args):
+        """Run job(*args, cancel) on the worker thread for the current revision"""
+        task = AnalysisTask(self.analysis_revision, job, *args, self.analysis_cancel)
+        task.signals.finished.connect(self.on_analysis_finished, Qt.ConnectionType.QueuedConnection)
+        task.signals.failed.connect(self.on_analysis_failed, Qt.ConnectionType.QueuedConnection)
+        self.analysis_pool.start(task)
+        
+    def refresh_counts(self):
+        """Tier 0: counters, straight from the incremental analyzer"""
+        if self.incremental is not None:
+            self.show_counts(self.incremental.totals().to_dict())
+        
+    def refresh_words(self):
+        """Tier 1: unique, top and longest words, ranked on the worker thread"""
+        self.start_analysis(self.compute_stats, self.snapshot())
+        
+    def refresh_details(self):
+        """Tier 2: heatmap, readability and keyword table, once typing pauses"""
+        snapshot = self.snapshot()
+        top_n = self.heatmap_words_slider.value()
         
-        if HAS_RUST:
-            stats = wdlib.analyze_text_fast(text)
-            stats_dict = json.loads(stats.to_json())
+        keywords_text = self.keyword_input.text()
+        keywords = [k.strip().lower() for k in keywords_text.split(',')] if keywords_text.strip() else []
+        matcher = None
+        if HAS_RUST and keywords:
+            # The matcher is only rebuilt when the keyword list changes
+            if self.keyword_matcher is None or self.keyword_matcher.keywords != keywords:
+                self.keyword_matcher = wdlib.KeywordMatcher(keywords)
+            matcher = self.keyword_matcher
+        
+        self.start_analysis(self.compute_details, snapshot, top_n, keywords, matcher)
+        
+    def compute_stats(self, snapshot, cancel=None):
+        """Word statistics on the worker thread"""
+        started = time.perf_counter()
+        table = snapshot.tokens(cancel)
+        if table is not None:
+            # Ranked with the revision's token table, which its details reuse
+            stats_dict = table.stats.to_dict()
         else:
-            stats_dict = self.analyze_with_python(text)
+            stats_dict = self.analyze_with_python(snapshot)
+        return {'stats': stats_dict, 'size': len(snapshot), 'seconds': time.perf_counter() - started}
+        
+    def compute_details(self, snapshot, top_n, keywords, matcher=None, cancel=None):
+        """Analyze a snapshot on the worker thread (no widget access here)"""
+        started = time.perf_counter()
+        # One scan of the text: every section below reads the snapshot's token table
+        snapshot.tokens(cancel)
+        result = {
+            'text': snapshot.text,
+            'top_n': top_n,
+            'heatmap': self.generate_word_heatmap(snapshot, top_n),
+            'readability': self.calculate_readability_scores(snapshot),
+            'keywords': self.count_keywords(snapshot, keywords, matcher),
+        }
+        result['seconds'] = time.perf_counter() - started
+        return result
+        
+    def on_analysis_finished(self, revision, result):
+        """Show a finished analysis if it is still the latest one"""
+        # A finished run measures the cost of analysis even when it is outdated
+        if 'text' in result:
+            self.details_interval.record(len(result['text']), result['seconds'])
+        elif 'seconds' in result:
+            self.words_interval.record(result['size'], result['seconds'])
+        
+        if revision != self.analysis_revision:
+            return
+        
+        if 'stats' in result:
+            self.show_stats(result['stats'])
+        if 'heatmap' in result:
+            self.draw_heatmap(result['heatmap'], result['top_n'])
+        if 'readability' in result:
+            self.show_readability_scores(result['readability'])
+        if 'keywords' in result:
+            self.show_keyword_analysis(result['keywords'])
+        if 'text' not in result:
+            return
+            
+        # Update status
+        self.status_bar.showMessage(f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
+        
+        # Store in history, with the word statistics shown for this revision
+        text = result['text']
+        self.stats_history.append({
+            'timestamp': time.time(),
+            'stats': self.last_stats,
+            'text_preview': text[:100] + "..." if len(text) > 100 else text
+        })
         
-        # Update basic stats
+        # Keep only last 100 entries
+        if len(self.stats_history) > 100:
+            self.stats_history.pop(0)
+            
+    def show_counts(self, stats_dict):
+        """Update the counters"""
         self.stat_widgets["wordCount"].setText(f"{stats_dict.get('words', 0):,}")
         self.stat_widgets["charCount"].setText(f"{stats_dict.get('characters', 0):,}")
         self.stat_widgets["charNoSpaceCount"].setText(f"{stats_dict.get('characters_no_spaces', 0):,}")
         self.stat_widgets["sentenceCount"].setText(f"{stats_dict.get('sentences', 0):,}")
         self.stat_widgets["paragraphCount"].setText(f"{stats_dict.get('paragraphs', 0):,}")
-        self.stat_widgets["uniqueWordCount"].setText(f"{stats_dict.get('unique_words', 0):,}")
         
         avg_length = stats_dict.get('avg_word_length', 0.0)
         self.stat_widgets["avgWordLength"].setText(f"{avg_length:.2f}")
@@ -415,6 +590,12 @@ class WDMainWindow(QMainWindow):
         reading_time = stats_dict.get('reading_time_seconds', 0)
         self.stat_widgets["readingTime"].setText(f"{reading_time}s ({reading_time//60}m)")
         
+    def show_stats(self, stats_dict):
+        """Update the counters and word lists"""
+        self.last_stats = stats_dict
+        self.show_counts(stats_dict)
+        self.stat_widgets["uniqueWordCount"].setText(f"{stats_dict.get('unique_words', 0):,}")
+        
         # Update top words
         top_words = stats_dict.get('top_words', [])
         if top_words:
@@ -431,31 +612,14 @@ class WDMainWindow(QMainWindow):
         else:
             self.longest_words_text.setText("No data")
             
-        # Update heatmap
-        self.update_heatmap()
-        
-        # Update readability
-        self.update_readability_scores(text)
-            
-        # Update status
-        self.status_bar.showMessage(f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
-        
-        # Store in history
-        self.stats_history.append({
-            'timestamp': time.time(),
-            'stats': stats_dict,
-            'text_preview': text[:100] + "..." if len(text) > 100 else text
-        })
-        
-        # Keep only last 100 entries
-        if len(self.stats_history) > 100:
-            self.stats_history.pop(0)
+    def on_analysis_failed(self, revision, message):
+        """Report a failed analysis if it is still the latest one"""
+        if revision == self.analysis_revision:
+            self.status_bar.showMessage(f"Analysis failed: {message}")
             
-    def analyze_with_python(self, text: str) -> Dict[str, Any]:
+    def analyze_with_python(self, snapshot: DocumentSnapshot) -> Dict[str, Any]:
         """Fallback Python analyzer if Rust not available"""
-        import re
-        from collections import Counter
-        
+        text = snapshot.text
         stats = {
             'words': 0,
             'characters': 0,
@@ -481,21 +645,20 @@ class WDMainWindow(QMainWindow):
         stats['paragraphs'] = len(paragraphs)
         
         # Sentences
-        sentences = re.split(r'[.!?]+', text)
-        stats['sentences'] = len([s for s in sentences if s.strip()])
+        stats['sentences'] = len(snapshot.sentences)
         
         # Words
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = snapshot.words
         stats['words'] = len(words)
         
         if words:
             # Word frequency
-            word_counts = Counter(words)
+            word_counts = snapshot.vocabulary
             stats['unique_words'] = len(word_counts)
             stats['top_words'] = word_counts.most_common(5)
             
             # Longest words
-            unique_words = list(set(words))
+            unique_words = list(word_counts)
             unique_words.sort(key=len, reverse=True)
             stats['longest_words'] = unique_words[:5]
             
@@ -535,7 +698,7 @@ class WDMainWindow(QMainWindow):
         self.heatmap_words_slider.setRange(5, 50)
         self.heatmap_words_slider.setValue(15)
         self.heatmap_words_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.heatmap_words_slider.valueChanged.connect(self.update_heatmap)
+        self.heatmap_words_slider.valueChanged.connect(lambda: self.refresh_scheduler.request(TIER_DETAILS, 0))
         
         controls_label = QLabel("Top Words:")
         controls_label.setStyleSheet("color: #aaaaaa;")
@@ -545,44 +708,46 @@ class WDMainWindow(QMainWindow):
         
         self.stats_layout.addLayout(heatmap_controls)
         
-    def generate_word_heatmap(self, text, top_n=15):
+    def generate_word_heatmap(self, snapshot, top_n=15, cancel=None):
         """Generate heatmap data for word frequency distribution"""
-        if not text.strip():
+        if snapshot.is_blank():
             return None
         
-        # Split text into chunks
-        chunks = self.split_text_into_chunks(text, num_chunks=20)
+        text = snapshot.text
+        num_chunks = min(20, len(text))
+        table = snapshot.tokens(cancel)
+        if table is not None:
+            top_words, matrix = table.frequency_matrix(top_n, num_chunks, bin_by="characters")
+            if not top_words:
+                return None
+            return {
+                'matrix': np.asarray(matrix, dtype=float),
+                'words': top_words,
+                'chunks': [f"Part {i+1}" for i in range(num_chunks)]
+            }
         
         # Get top N words overall
-        words = self.extract_words(text.lower())
-        word_counts = Counter(words)
-        top_words = [word for word, _ in word_counts.most_common(top_n)]
+        top_words = [word for word, _ in snapshot.vocabulary.most_common(top_n)]
         
         if not top_words:
             return None
         
-        # Create frequency matrix
-        freq_matrix = np.zeros((len(top_words), len(chunks)))
-        
-        for i, chunk in enumerate(chunks):
-            chunk_words = self.extract_words(chunk.lower())
-            chunk_counts = Counter(chunk_words)
-            for j, word in enumerate(top_words):
-                freq_matrix[j, i] = chunk_counts.get(word, 0)
+        # Create frequency matrix; a word falls in the part of the text it starts in
+        rows = {word: j for j, word in enumerate(top_words)}
+        freq_matrix = np.zeros((len(top_words), num_chunks))
+        for word, start in zip(snapshot.words, snapshot.word_starts):
+            row = rows.get(word)
+            if row is not None:
+                freq_matrix[row, start * num_chunks // len(text)] += 1
         
         return {
             'matrix': freq_matrix,
             'words': top_words,
-            'chunks': [f"Part {i+1}" for i in range(len(chunks))]
+            'chunks': [f"Part {i+1}" for i in range(num_chunks)]
         }
         
-    def update_heatmap(self):
-        """Update the heatmap visualization"""
-        text = self.text_input.toPlainText()
-        top_n = self.heatmap_words_slider.value()
-        
-        heatmap_data = self.generate_word_heatmap(text, top_n)
-        
+    def draw_heatmap(self, heatmap_data, top_n):
+        """Draw heatmap data from generate_word_heatmap"""
         if not heatmap_data:
             self.heatmap_figure.clear()
             self.heatmap_canvas.draw()
@@ -724,20 +889,38 @@ class WDMainWindow(QMainWindow):
         except:
             return 0.0
 
-    def update_readability_scores(self, text):
-        """Update all readability scores"""
-        if not text.strip():
+    def calculate_readability_scores(self, snapshot, cancel=None):
+        """Calculate all readability scores (None for empty text)"""
+        if snapshot.is_blank():
+            return None
+        
+        table = snapshot.tokens(cancel)
+        if table is not None:
+            # Sentence, word and syllable counts from the snapshot's token table
+            readability = table.readability()
+            return {
+                "flesch_ease": min(max(readability.flesch_reading_ease, 0), 100),
+                "flesch_grade": readability.flesch_kincaid_grade,
+                "gunning_fog": readability.gunning_fog,
+                "coleman_liau": readability.coleman_liau_index,
+                "smog": readability.smog_index,
+                "automated": readability.automated_readability_index,
+            }
+        return {key: func(snapshot.text) for key, (_, func) in self.readability_widgets.items()}
+        
+    def show_readability_scores(self, scores):
+        """Update all readability widgets from calculate_readability_scores"""
+        if scores is None:
             for key, (widget, _) in self.readability_widgets.items():
                 widget.setText("0.0")
             self.readability_desc.setText("")
             return
         
-        for key, (widget, func) in self.readability_widgets.items():
-            score = func(text)
-            widget.setText(f"{score:.1f}")
+        for key, (widget, _) in self.readability_widgets.items():
+            widget.setText(f"{scores[key]:.1f}")
         
         # Update description based on Flesch Reading Ease
-        flesch_score = self.calculate_flesch_ease(text)
+        flesch_score = scores["flesch_ease"]
         if flesch_score >= 90:
             level = "Very Easy (5th grade)"
         elif flesch_score >= 80:
@@ -784,6 +967,14 @@ class WDMainWindow(QMainWindow):
         self.keyword_input = QLineEdit()
         self.keyword_input.setPlaceholderText("Enter keywords (comma separated)...")
         self.keyword_input.setObjectName("keywordInput")
+        # Keywords are counted among the words of the text, not in its raw characters
+        self.keyword_input.setToolTip(
+            "Keywords and phrases are matched against whole words, ignoring case and accents.\n"
+            "A phrase matches consecutive words of one sentence; punctuation between them\n"
+            "is ignored (\"machine, learning\" counts as \"machine learning\").\n"
+            "A hyphenated word is a single word: \"machine-learning\" does not count as\n"
+            "\"learning\" or \"machine learning\"."
+        )
         self.keyword_input.textChanged.connect(self.update_keyword_analysis)
         
         keyword_layout.addWidget(QLabel("Keywords:"))
@@ -805,29 +996,37 @@ class WDMainWindow(QMainWindow):
         self.stats_layout.addWidget(self.seo_recommendations)
 
     def update_keyword_analysis(self):
-        """Update keyword density analysis"""
-        text = self.text_input.toPlainText()
-        keywords_text = self.keyword_input.text()
+        """Recount keywords once the keyword list stops changing"""
+        self.refresh_scheduler.request(TIER_DETAILS, self.refresh_scheduler.delay(TIER_WORDS))
+        
+    def count_keywords(self, snapshot, keywords, matcher=None, cancel=None):
+        """Count keywords on the worker thread; None when there is nothing to count"""
+        if snapshot.is_blank() or not keywords:
+            return None
+        
+        if matcher is not None:
+            table = snapshot.tokens(cancel)
+            keyword_counts = matcher.count_tokens(table)
+            total_words = len(table)
+        else:
+            keyword_counts = [snapshot.vocabulary.get(keyword, 0) for keyword in keywords]
+            total_words = len(snapshot.words)
+        return keywords, keyword_counts, total_words
         
-        if not text.strip() or not keywords_text.strip():
+    def show_keyword_analysis(self, keyword_result):
+        """Update keyword density analysis"""
+        if keyword_result is None:
             self.keyword_table.setRowCount(0)
             self.seo_recommendations.setText("")
             return
         
-        keywords = [k.strip().lower() for k in keywords_text.split(',')]
-        words = self.extract_words(text.lower())
-        total_words = len(words)
-        
+        keywords, keyword_counts, total_words = keyword_result
         self.keyword_table.setRowCount(len(keywords))
         
-        from collections import Counter
-        word_counts = Counter(words)
-        
         optimal_density = 1.0  # 1% optimal keyword density for SEO
         recommendations = []
         
-        for i, keyword in enumerate(keywords):
-            count = word_counts.get(keyword, 0)
+        for i, (keyword, count) in enumerate(zip(keywords, keyword_counts)):
             density = (count / total_words * 100) if total_words > 0 else 0
             
             # Keyword
@@ -879,31 +1078,6 @@ class WDMainWindow(QMainWindow):
         else:
             self.seo_recommendations.setText("✅ All keywords are optimally used")
 
-    def extract_words(self, text):
-        """Extract words from text (helper method)"""
-        import re
-        return re.findall(r'\b[a-zA-Z]+\b', text)
-        
-    def split_text_into_chunks(self, text, num_chunks=20):
-        """Split text into roughly equal chunks"""
-        if not text:
-            return []
-        
-        length = len(text)
-        chunk_size = max(1, length // num_chunks)
-        
-        chunks = []
-        for i in range(0, length, chunk_size):
-            chunks.append(text[i:i+chunk_size])
-            
-        # Ensure we don't exceed num_chunks (merge remainder into last chunk)
-        if len(chunks) > num_chunks:
-            last_chunk = "".join(chunks[num_chunks-1:])
-            chunks = chunks[:num_chunks-1]
-            chunks.append(last_chunk)
-            
-        return chunks
-        
     def clear_text(self):
         """Clear the text input"""
         self.text_input.clear()
@@ -919,22 +1093,22 @@ class WDMainWindow(QMainWindow):
             
     def export_stats(self):
         """Export statistics to file"""
-        text = self.text_input.toPlainText()
+        snapshot = self.snapshot()
         
-        if not text.strip():
+        if snapshot.is_blank():
             QMessageBox.warning(self, "No Data", "No text to export.")
             return
         
-        # Generate stats
-        if HAS_RUST:
-            stats = wdlib.analyze_text_fast(text)
-            stats_dict = json.loads(stats.to_json())
+        # Generate stats; the token table is usually built already
+        table = snapshot.tokens()
+        if table is not None:
+            stats_dict = table.stats.to_dict()
         else:
-            stats_dict = self.analyze_with_python(text)
+            stats_dict = self.analyze_with_python(snapshot)
         
         # Use ExportManager
         exporter = ExportManager(self)
-        exporter.export_stats(stats_dict, text)
+        exporter.export_stats(stats_dict, snapshot.text)
         
     def create_theme_selector(self):
         """Create theme selection dropdown"""
@@ -956,6 +1130,15 @@ class WDMainWindow(QMainWindow):
         # Add to left layout
         self.left_layout.addLayout(theme_layout)
         
+    def closeEvent(self, event):
+        """Stop background analysis before the window closes"""
+        self.refresh_scheduler.stop()
+        if self.analysis_cancel is not None:
+            self.analysis_cancel.cancel()
+        self.analysis_pool.clear()
+        self.analysis_pool.waitForDone()
+        super().closeEvent(event)
+        
     def change_theme(self):
         """Change the application theme"""
         theme_id = self.theme_combo.currentData()
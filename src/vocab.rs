@@ -0,0 +1,294 @@
+// Interned word counts.
+//
+// Words are interned once and keep their id across analyses, so a reused
+// `Analyzer` only allocates for words it has never seen before. Counts are
+// reset lazily through the list of ids touched by the previous run.
+//
+// Word bytes live back to back in one append-only arena and the lookup
+// table only stores ids, hashed with FxHash; there is no per-word
+// allocation. The arena is cleared together with the ids once the retained
+// vocabulary outgrows its limits.
+//
+// Counts can also be taken back (`remove`), for a document edited in place.
+// Words whose count drops to zero stay interned until `compact` rebuilds the
+// storage from the live words alone.
+
+use hashbrown::HashTable;
+use rustc_hash::FxBuildHasher;
+use std::hash::BuildHasher;
+use std::ops::Range;
+
+// Above this many retained words or arena bytes the interned storage is
+// dropped on reset
+const MAX_RETAINED_WORDS: usize = 1 << 20;
+const MAX_RETAINED_BYTES: usize = 64 << 20;
+
+#[derive(Default)]
+pub struct Vocab {
+    table: HashTable<u32>,
+    arena: String,
+    // Arena range of every id
+    spans: Vec<Range<usize>>,
+    counts: Vec<usize>,
+    seen: Vec<u32>,
+    // Whether an id is in `seen`
+    listed: Vec<bool>,
+    // Ids with a nonzero count
+    live: usize,
+    scratch: String,
+}
+
+impl std::fmt::Debug for Vocab {
+    fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
+        f.debug_struct("Vocab")
+            .field("interned", &self.spans.len())
+            .field("seen", &self.seen.len())
+            .field("live", &self.live)
+            .field("arena_bytes", &self.arena.len())
+            .finish()
+    }
+}
+
+fn hash(word: &str) -> u64 {
+    FxBuildHasher.hash_one(word)
+}
+
+impl Vocab {
+    pub fn new() -> Self {
+        Vocab::default()
+    }
+
+    pub fn reset(&mut self) {
+        if self.spans.len() > MAX_RETAINED_WORDS || self.arena.len() > MAX_RETAINED_BYTES {
+            self.table.clear();
+            self.arena.clear();
+            self.spans.clear();
+            self.counts.clear();
+            self.listed.clear();
+        } else {
+            for &id in &self.seen {
+                self.counts[id as usize] = 0;
+                self.listed[id as usize] = false;
+            }
+        }
+        self.seen.clear();
+        self.live = 0;
+    }
+
+    // Counts one occurrence of `word` and returns its id
+    pub fn add(&mut self, word: &str) -> u32 {
+        // Most words are already lowercase ASCII and are looked up as they are
+        if word.bytes().all(|b| b.is_ascii_lowercase() || b == b'\'' || b == b'-') {
+            return self.add_lowercase(word, 1);
+        }
+        let mut scratch = std::mem::take(&mut self.scratch);
+        lowercase_into(word, &mut scratch);
+        let id = self.add_lowercase(&scratch, 1);
+        self.scratch = scratch;
+        id
+    }
+
+    fn add_lowercase(&mut self, word: &str, n: usize) -> u32 {
+        let hash = hash(word);
+        let (arena, spans) = (&self.arena, &self.spans);
+        let id = match self.table.find(hash, |&id| &arena[spans[id as usize].clone()] == word) {
+            Some(&id) => id,
+            None => {
+                let id = self.spans.len() as u32;
+                let start = self.arena.len();
+                self.arena.push_str(word);
+                self.spans.push(start..self.arena.len());
+                self.counts.push(0);
+                self.listed.push(false);
+                let (arena, spans) = (&self.arena, &self.spans);
+                self.table.insert_unique(hash, id, |&id| self::hash(&arena[spans[id as usize].clone()]));
+                id
+            }
+        };
+
+        let count = &mut self.counts[id as usize];
+        if *count == 0 {
+            self.live += 1;
+            // A removed word that comes back is already listed
+            if !self.listed[id as usize] {
+                self.listed[id as usize] = true;
+                self.seen.push(id);
+            }
+        }
+        *count += n;
+        id
+    }
+
+    // Adds another run's counts; merging in text order keeps first-seen order
+    pub fn merge(&mut self, other: &Vocab) {
+        for &id in &other.seen {
+            self.add_lowercase(other.word(id), other.count(id));
+        }
+    }
+
+    // Approximate heap bytes held, including retained words of earlier runs
+    pub fn scratch_bytes(&self) -> usize {
+        self.table.capacity() * (std::mem::size_of::<u32>() + 1)
+            + self.arena.capacity()
+            + self.spans.capacity() * std::mem::size_of::<Range<usize>>()
+            + self.counts.capacity() * std::mem::size_of::<usize>()
+            + self.seen.capacity() * std::mem::size_of::<u32>()
+            + self.listed.capacity()
+            + self.scratch.capacity()
+    }
+
+    // Takes back one occurrence of `id`. `ids()` is only right again after
+    // `set_ids`.
+    pub fn remove(&mut self, id: u32) {
+        self.counts[id as usize] -= 1;
+        if self.counts[id as usize] == 0 {
+            self.live -= 1;
+        }
+    }
+
+    // Replaces the order of `ids()`; `ids` must list every word with a
+    // nonzero count exactly once
+    pub fn set_ids(&mut self, ids: &[u32]) {
+        for &id in &self.seen {
+            self.listed[id as usize] = false;
+        }
+        for &id in ids {
+            self.listed[id as usize] = true;
+        }
+        self.seen.clear();
+        self.seen.extend_from_slice(ids);
+    }
+
+    // Interned words whose count was taken back to zero
+    pub fn dead(&self) -> usize {
+        self.spans.len() - self.live
+    }
+
+    // Drops every word with a zero count and renumbers the others, keeping
+    // their order. Returns the new id of every old id, u32::MAX for dropped
+    // ones; `ids()` keeps its live words.
+    pub fn compact(&mut self) -> Vec<u32> {
+        let mut remap = vec![u32::MAX; self.spans.len()];
+        let live_bytes = (0..self.spans.len())
+            .filter(|&id| self.counts[id] > 0)
+            .map(|id| self.spans[id].len())
+            .sum();
+        let mut arena = String::with_capacity(live_bytes);
+        let mut spans = Vec::with_capacity(self.live);
+        let mut counts = Vec::with_capacity(self.live);
+        for (id, span) in self.spans.iter().enumerate() {
+            if self.counts[id] > 0 {
+                remap[id] = spans.len() as u32;
+                let start = arena.len();
+                arena.push_str(&self.arena[span.clone()]);
+                spans.push(start..arena.len());
+                counts.push(self.counts[id]);
+            }
+        }
+
+        let mut table = HashTable::with_capacity(spans.len());
+        for (id, span) in spans.iter().enumerate() {
+            let hash = hash(&arena[span.clone()]);
+            table.insert_unique(hash, id as u32, |&id| self::hash(&arena[spans[id as usize].clone()]));
+        }
+        let mut listed = vec![false; spans.len()];
+        let seen: Vec<u32> = self.seen.iter().map(|&id| remap[id as usize]).filter(|&id| id != u32::MAX).collect();
+        for &id in &seen {
+            listed[id as usize] = true;
+        }
+
+        self.table = table;
+        self.arena = arena;
+        self.spans = spans;
+        self.counts = counts;
+        self.seen = seen;
+        self.listed = listed;
+        remap
+    }
+
+    // Distinct words of the current run
+    pub fn len(&self) -> usize {
+        self.seen.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.seen.is_empty()
+    }
+
+    // Ids of the current run in first-seen order
+    pub fn ids(&self) -> &[u32] {
+        &self.seen
+    }
+
+    // Number of ids ever assigned, including words not seen in this run
+    pub fn capacity(&self) -> usize {
+        self.spans.len()
+    }
+
+    pub fn word(&self, id: u32) -> &str {
+        &self.arena[self.spans[id as usize].clone()]
+    }
+
+    pub fn count(&self, id: u32) -> usize {
+        self.counts[id as usize]
+    }
+}
+
+// `str::to_lowercase` without the allocation. Only capital sigma lowercases
+// by context (final sigma, which applies to every part of "ΑΣ-ΒΓ"), so words
+// containing one go through `to_lowercase` itself.
+pub fn lowercase_into(word: &str, out: &mut String) {
+    out.clear();
+    if word.is_ascii() {
+        out.push_str(word);
+        out.make_ascii_lowercase();
+        return;
+    }
+    if word.contains('Σ') {
+        out.push_str(&word.to_lowercase());
+        return;
+    }
+    for c in word.chars() {
+        out.extend(c.to_lowercase());
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn compact_keeps_live_words_in_order() {
+        let mut vocab = Vocab::new();
+        for word in ["a", "b", "c", "b", "d"] {
+            vocab.add(word);
+        }
+        vocab.remove(0);
+        vocab.remove(2);
+        vocab.remove(1);
+        // "c" comes back: listed once, not twice
+        vocab.add("c");
+        assert_eq!(vocab.ids(), &[0, 1, 2, 3]);
+        assert_eq!(vocab.dead(), 1);
+
+        let remap = vocab.compact();
+        assert_eq!(remap, [u32::MAX, 0, 1, 2]);
+        assert_eq!(vocab.ids(), &[0, 1, 2]);
+        let words: Vec<(&str, usize)> = vocab.ids().iter().map(|&id| (vocab.word(id), vocab.count(id))).collect();
+        assert_eq!(words, [("b", 1), ("c", 1), ("d", 1)]);
+        assert_eq!((vocab.dead(), vocab.capacity()), (0, 3));
+        assert_eq!(vocab.add("d"), 2);
+        assert_eq!(vocab.add("a"), 3);
+    }
+
+    #[test]
+    fn lowercase_matches_to_lowercase() {
+        let mut out = String::new();
+        for word in ["ΟΔΟΣ", "ΑΣ-ΒΓ", "ΑΣ'Β", "Σ", "ΣΑ", "Α-Σ", "ΑΣΣ", "İstanbul", "Straße", "ǅx", "Don't"] {
+            lowercase_into(word, &mut out);
+            assert_eq!(out, word.to_lowercase(), "{}", word);
+        }
+        lowercase_into("ΑΣ-ΒΓ", &mut out);
+        assert_eq!(out, "ας-βγ");
+    }
+}
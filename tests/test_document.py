@@ -0,0 +1,44 @@
+"""
+WD - Document snapshot tests
+The Python fallback tokenizer against the Rust scanner it stands in for
+"""
+
+import pytest
+
+wdlib = pytest.importorskip("wdlib")
+
+from src import document
+from src.document import WORD_PATTERN, DocumentSnapshot
+
+SAMPLES = [
+    "The quick brown fox. Can't stop -- won't stop!",
+    "well-known a--b -dash- 'quoted' a-'-b rock'n'roll",
+    "हिन्दी भाषा",
+    "x² H₂O 3rd ⅻ",
+    "İstanbul İİ Straße",
+    "ΟΔΟΣ ΑΣ-ΒΓ Σ ΑΣ'Β",
+    "naïve café é ́x",
+    "東京 日本語、ひらがな",
+    "tab\tseparated\x1cunit　ideographic",
+]
+
+
+def snapshot(text, monkeypatch, rust):
+    monkeypatch.setattr(document, "HAS_RUST", rust)
+    snap = DocumentSnapshot(text)
+    return snap.words, snap.word_starts, list(snap.vocabulary.items())
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_fallback_matches_scanner(text, monkeypatch):
+    assert snapshot(text, monkeypatch, False) == snapshot(text, monkeypatch, True)
+
+
+def test_fallback_letters_match_scanner():
+    # Every code point between two separators: a letter the two disagree on
+    # shows up as a missing or extra word. Case mappings differ between
+    # Unicode versions, so only the offsets are compared.
+    text = " ".join(chr(cp) for cp in range(0x80, 0x110000) if not 0xD800 <= cp <= 0xDFFF)
+    table = wdlib.token_table(text)
+    spans = [(match.start(), match.end()) for match in WORD_PATTERN.finditer(text)]
+    assert spans == list(zip(table.starts.tolist(), table.ends.tolist()))